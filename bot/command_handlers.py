@@ -6,10 +6,9 @@ Handles all user commands and interactions cleanly separated from main bot logic
 
 import logging
 import os
-import requests
 from typing import Dict, List, Optional
 
-from notifier.telegram_notifier import send_telegram_message
+from notifier.telegram_notifier import send_telegram_message, answer_callback_query
 from database.crud import botsettings_get, botsettings_set
 from database.simple_per_group import list_all_groups, get_or_create_group, drop_group_table
 from config import (
@@ -99,13 +98,7 @@ class CommandHandlers:
         
         # Answer callback query
         def answer_callback(text, show_alert=False):
-            answer_url = f"https://api.telegram.org/bot{bot_token}/answerCallbackQuery"
-            payload = {
-                "callback_query_id": callback_query_id,
-                "text": text,
-                "show_alert": show_alert
-            }
-            return requests.post(answer_url, json=payload).ok
+            return answer_callback_query(bot_token, callback_query_id, text, show_alert)
         
         try:
             if callback_data.startswith('login_'):
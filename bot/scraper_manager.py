@@ -13,9 +13,12 @@ from config import create_reliable_webdriver, get_cookie_store_path
 from scraper.facebook_scraper_headless import scrape_authenticated_group, is_facebook_session_valid
 from scraper.session_persistence import load_cookies, save_cookies
 # Import database functions when needed to avoid early Selenium imports
-from notifier.telegram_notifier import send_telegram_message, format_post_message
+from notifier.telegram_notifier import broadcast_message_async, clean_post_text, format_post_message
 from ai.openai_service import decide_and_summarize_for_post
 
+# AI-filtered posts are saved (and notified) in batches of this size while a group is scraped
+_SAVE_BATCH_SIZE = 5
+
 
 class ScraperManager:
     """
@@ -109,7 +112,6 @@ class ScraperManager:
     ) -> None:
         """Scrape a single Facebook group."""
         group_url = group_data['group_url']
-        group_id = group_data['group_id']
         table_name = group_data['table_name']
         
         # Store current group name for notifications
@@ -119,9 +121,8 @@ class ScraperManager:
         
         try:
             # Get most recent post hash from database (now includes ALL posts)
-            from database.simple_per_group import get_most_recent_facebook_post_id, get_most_recent_post_content_hash
-            most_recent_fb_id = get_most_recent_facebook_post_id(conn, table_name)
-            most_recent_hash = get_most_recent_post_content_hash(conn, table_name)
+            from database.simple_per_group import get_most_recent_post_markers
+            most_recent_fb_id, most_recent_hash, _ = get_most_recent_post_markers(conn, table_name)
             
             # Quick check: if we can get the first post ID from Facebook and it matches database, skip entirely
             if most_recent_fb_id:
@@ -147,12 +148,28 @@ class ScraperManager:
             
             logging.info(f"📊 Found {len(posts)} new posts in group {group_url}")
             
-            # SIMPLE ARCHITECTURE: Process each post immediately (like before)
-            for post_index, post in enumerate(posts):
-                await self._process_single_post(
-                    post, group_id, table_name, conn,
-                    bot_token, chat_ids, reliability
-                )
+            # One batched check against saved and processed posts, then drop the ones already seen
+            from database.simple_per_group import filter_unseen_hashes
+            unseen_hashes = filter_unseen_hashes(conn, table_name, [post.get('content_hash') for post in posts])
+            posts = [post for post in posts if post.get('content_hash') in unseen_hashes]
+            
+            # AI-filter each post and save them in small batches (one transaction each)
+            prepared = []
+            seen_hashes = set()
+            try:
+                for post in posts:
+                    if post.get('content_hash') in seen_hashes:
+                        continue
+                    seen_hashes.add(post.get('content_hash'))
+                    post_data_dict = await self._process_single_post(post, conn)
+                    if post_data_dict:
+                        prepared.append(post_data_dict)
+                    if len(prepared) >= _SAVE_BATCH_SIZE:
+                        await self._save_processed_posts(prepared, table_name, conn, bot_token, chat_ids)
+                        prepared = []
+            finally:
+                # Keep posts already classified even if a later one fails
+                await self._save_processed_posts(prepared, table_name, conn, bot_token, chat_ids)
             
         except Exception as e:
             logging.error(f"❌ Error scraping group {group_url}: {e}")
@@ -176,51 +193,43 @@ class ScraperManager:
         
         # STEP 1: Save ALL posts to database immediately (no AI processing yet)
         saved_posts = []
+        batch = []
+        batch_indexes = []
         
         for post_index, post in enumerate(posts):
-            try:
-                # Extract post data
-                content = post.get('content_text', '')
-                post_url = post.get('post_url', '')
-                content_hash = post.get('content_hash', '')
-                
-                if not content or not content_hash:
-                    logging.warning(f"⚠️ Skipping post {post_index + 1} with missing content or hash")
-                    continue
-
-                # Check for duplicates
-                from database.simple_per_group import content_hash_exists
-                if content_hash_exists(conn, table_name, content_hash):
-                    logging.info(f"🔄 Skipping duplicate post {post_index + 1} (hash: {content_hash[:12]}...)")
-                    continue
-
-                # Prepare post data for database (NO AI processing yet)
-                post_data_dict = {
-                    'facebook_post_id': post.get('facebook_post_id'),
-                    'post_url': post_url,
-                    'content_text': content,
-                    'content_hash': content_hash
-                    # ai_relevant will be NULL until AI processes it
-                }
-                
-                # Save to database immediately
-                from database.simple_per_group import add_post_to_group
-                db_result = add_post_to_group(conn, table_name, post_data_dict)
-                
-                if db_result and db_result[1]:  # Successfully saved (new post)
-                    saved_posts.append({
-                        'internal_post_id': db_result[0],
-                        'content': content,
-                        'post_url': post_url,
-                        'post_index': post_index + 1
-                    })
-                    logging.info(f"💾 Saved post {post_index + 1} to database with ID {db_result[0]} (AI pending)")
-                else:
-                    logging.info(f"📝 Post {post_index + 1} already exists in database")
-                    
-            except Exception as e:
-                logging.error(f"❌ Error saving post {post_index + 1}: {e}")
+            # Extract post data
+            content = post.get('content_text', '')
+            content_hash = post.get('content_hash', '')
+            
+            if not content or not content_hash:
+                logging.warning(f"⚠️ Skipping post {post_index + 1} with missing content or hash")
                 continue
+            
+            # Prepare post data for database (NO AI processing yet)
+            batch.append({
+                'facebook_post_id': post.get('facebook_post_id'),
+                'post_url': post.get('post_url', ''),
+                'content_text': content,
+                'content_hash': content_hash
+                # ai_relevant will be NULL until AI processes it
+            })
+            batch_indexes.append(post_index + 1)
+        
+        # Save the whole batch in one transaction; duplicates are reported as not new
+        from database.simple_per_group import add_posts_to_group
+        db_results = add_posts_to_group(conn, table_name, batch) or []
+        
+        for post_data_dict, post_number, db_result in zip(batch, batch_indexes, db_results):
+            if db_result[1]:  # Successfully saved (new post)
+                saved_posts.append({
+                    'internal_post_id': db_result[0],
+                    'content': post_data_dict['content_text'],
+                    'post_url': post_data_dict['post_url'],
+                    'post_index': post_number
+                })
+                logging.info(f"💾 Saved post {post_number} to database with ID {db_result[0]} (AI pending)")
+            else:
+                logging.info(f"📝 Post {post_number} already exists in database")
         
         if not saved_posts:
             logging.info("📭 No new posts saved")
@@ -238,17 +247,8 @@ class ScraperManager:
         
         logging.info(f"🎉 Complete: {len(saved_posts)} posts saved and processed")
     
-    async def _process_single_post(
-        self,
-        post: Dict,
-        group_id: int,
-        table_name: str,
-        conn,
-        bot_token: str,
-        chat_ids: List[str],
-        reliability: Dict
-    ) -> None:
-        """Process a single post with AI filtering and notifications."""
+    async def _process_single_post(self, post: Dict, conn) -> Optional[Dict]:
+        """Run AI filtering on a single post and return its row data for saving (None to skip)."""
         try:
             # Extract post data using ACTUAL field names from scraper - NO AUTHOR
             content = post.get('content_text', '')
@@ -258,13 +258,7 @@ class ScraperManager:
             
             if not content or not content_hash:
                 logging.warning("⚠️ Skipping post with missing content or hash")
-                return
-            
-            # CHECK FOR DUPLICATES BEFORE AI PROCESSING (save API costs)
-            from database.simple_per_group import content_hash_exists
-            if content_hash_exists(conn, table_name, content_hash):
-                logging.info(f"🔄 Skipping duplicate post (hash: {content_hash[:12]}...)")
-                return
+                return None
             
             # AI Processing
             ai_result = None
@@ -297,28 +291,42 @@ class ScraperManager:
                 logging.error(f"❌ AI processing failed: {e}")
                 # Continue without AI - still save the post
             
-            # Save to database
-            from database.simple_per_group import add_post_to_group
-            post_data_dict = {
+            return {
                 'content_text': content,
                 'post_url': post_url,
                 'content_hash': content_hash,
                 'ai_result': ai_result
                 # NO AUTHOR - per user requirement
             }
-            result = add_post_to_group(conn, table_name, post_data_dict)
-            
-            # Send notification ONLY if post was actually saved (not duplicate) and relevant
-            if result and result[1] and ai_result and ai_result.get('relevant', False):
-                await self._send_post_notification(
-                    content, author, post_url, ai_result,
-                    bot_token, chat_ids
-                )
             
         except Exception as e:
             logging.error(f"❌ Error processing single post: {e}")
             raise
     
+    async def _save_processed_posts(
+        self,
+        prepared: List[Dict],
+        table_name: str,
+        conn,
+        bot_token: str,
+        chat_ids: List[str]
+    ) -> None:
+        """Save AI-processed posts in one batch, then notify for new relevant ones."""
+        if not prepared:
+            return
+        
+        from database.simple_per_group import add_posts_to_group
+        results = add_posts_to_group(conn, table_name, prepared) or []
+        
+        for post_data_dict, result in zip(prepared, results):
+            ai_result = post_data_dict['ai_result']
+            # Send notification ONLY if post was actually saved (not duplicate) and relevant
+            if result[1] and ai_result and ai_result.get('relevant', False):
+                await self._send_post_notification(
+                    post_data_dict['content_text'], 'Anonymous', post_data_dict['post_url'],
+                    ai_result, bot_token, chat_ids
+                )
+    
     async def _send_post_notification(
         self,
         content: str,
@@ -331,8 +339,8 @@ class ScraperManager:
         """Send Telegram notification for relevant post."""
         try:
             # Get group name from database
-            from database.crud import get_db_connection
-            conn = get_db_connection()
+            from database.crud import acquire_db_connection, release_db_connection
+            conn = acquire_db_connection(readonly=True)
             
             # Get actual group name from database using post URL
             group_name = "Unknown Group"
@@ -368,12 +376,12 @@ class ScraperManager:
             except Exception as e:
                 logging.debug(f"Could not get group name: {e}")
             
-            conn.close()
+            release_db_connection(conn, readonly=True)
             
             # Format notification message using Lithuanian format
             title = "Naujas įrašas"
             # Use actual post content, not AI summary (limit to 300 chars and clean up)
-            clean_content = content.replace('See more', '').replace('Show more', '').replace('… Žr. daugiau', '').replace('Žr. daugiau', '').strip()
+            clean_content = clean_post_text(content)
             short_text = clean_content[:300] + '...' if len(clean_content) > 300 else clean_content
             
             message = format_post_message(title, short_text, post_url, author, group_name)
@@ -385,16 +393,13 @@ class ScraperManager:
                 logging.info("📱 No group chats configured for notifications")
                 return
                 
-            for chat_id in group_chats:
-                try:
-                    success = send_telegram_message(bot_token, chat_id, message, parse_mode="HTML")
-                    if success:
-                        logging.info(f"📱 Notification sent to group {chat_id}")
-                    else:
-                        logging.warning(f"⚠️ Failed to send notification to group {chat_id}")
-                except Exception as e:
-                    logging.error(f"❌ Error sending to group {chat_id}: {e}")
-                    continue
+            # All group chats at once, off the event loop
+            results = await broadcast_message_async(bot_token, group_chats, message, parse_mode="HTML")
+            for chat_id, success in zip(group_chats, results):
+                if success:
+                    logging.info(f"📱 Notification sent to group {chat_id}")
+                else:
+                    logging.warning(f"⚠️ Failed to send notification to group {chat_id}")
             
         except Exception as e:
             logging.error(f"❌ Error sending notification: {e}")
@@ -437,7 +442,7 @@ class ScraperManager:
         batch_size: int = 10
     ) -> None:
         """Process unprocessed posts with AI in batches."""
-        from database.simple_per_group import get_unprocessed_posts, update_ai_result
+        from database.simple_per_group import get_unprocessed_posts, update_ai_result, group_write_txn
         from config import get_bot_runner_settings
         from database.crud import botsettings_get
         
@@ -458,6 +463,7 @@ class ScraperManager:
                 
             logging.info(f"🤖 AI processing batch of {len(unprocessed_posts)} posts...")
             
+            results = []
             for post in unprocessed_posts:
                 try:
                     # Create post dict for AI processing
@@ -473,18 +479,7 @@ class ScraperManager:
                         user_prompt
                     )
                     
-                    # Update database with AI result
-                    success = update_ai_result(
-                        conn, table_name, post['internal_post_id'], 
-                        is_relevant, summary
-                    )
-                    
-                    if success:
-                        status = "relevant" if is_relevant else "not relevant"
-                        logging.info(f"🤖 AI processed post ID {post['internal_post_id']}: {status}")
-                        processed_count += 1
-                    else:
-                        logging.error(f"❌ Failed to update AI result for post ID {post['internal_post_id']}")
+                    results.append((post['internal_post_id'], is_relevant, summary))
                         
                     # Small delay between AI calls to avoid rate limits - OPTIMIZED
                     await asyncio.sleep(0.2)
@@ -492,9 +487,19 @@ class ScraperManager:
                 except Exception as e:
                     logging.error(f"❌ AI processing error for post ID {post['internal_post_id']}: {e}")
                     # Mark as processed but not relevant to avoid reprocessing
-                    update_ai_result(conn, table_name, post['internal_post_id'], False)
+                    results.append((post['internal_post_id'], False, None))
                     continue
             
+            # Write the whole batch's AI results in one transaction
+            with group_write_txn(conn):
+                for internal_post_id, is_relevant, summary in results:
+                    if update_ai_result(conn, table_name, internal_post_id, is_relevant, summary):
+                        status = "relevant" if is_relevant else "not relevant"
+                        logging.info(f"🤖 AI processed post ID {internal_post_id}: {status}")
+                        processed_count += 1
+                    else:
+                        logging.error(f"❌ Failed to update AI result for post ID {internal_post_id}")
+            
             # Delay between batches
             if len(unprocessed_posts) == batch_size:  # More batches likely
                 await asyncio.sleep(reliability.get('post_processing_delay', 2))
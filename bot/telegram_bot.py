@@ -11,7 +11,7 @@ from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 
 from notifier.telegram_notifier import get_updates, extract_commands, send_telegram_message
-from database.crud import get_db_connection, botsettings_get, botsettings_set
+from database.crud import get_db_connection, acquire_db_connection, release_db_connection, botsettings_get, botsettings_set
 from database.simple_per_group import list_all_groups
 from config import (
     get_telegram_settings, get_bot_runner_settings, get_hourly_limit_defaults,
@@ -100,9 +100,10 @@ class ScrapiusTelegramBot:
     async def handle_telegram_updates(self, conn) -> None:
         """Handle incoming Telegram messages and commands."""
         try:
-            # Get Telegram updates with short timeout for responsiveness
+            # Get Telegram updates with short timeout for responsiveness;
+            # the poll runs in a worker thread so it doesn't stall the event loop
             offset = self.last_update_id + 1 if self.last_update_id else None
-            updates = get_updates(self.bot_token, offset=offset, timeout=2)
+            updates = await asyncio.to_thread(get_updates, self.bot_token, offset=offset, timeout=2)
             
             if not updates.get('ok') or not updates.get('result'):
                 return
@@ -264,7 +265,7 @@ class ScrapiusTelegramBot:
                 # Heartbeat every 600 loops (roughly every 60 seconds)
                 if loop_count % 600 == 0:
                     logging.info(f"💓 Bot heartbeat - loop {loop_count} - responsive and running")
-                conn = get_db_connection()
+                conn = acquire_db_connection()
                 if not conn:
                     logging.error("❌ Could not connect to database in main loop")
                     await asyncio.sleep(60)
@@ -282,7 +283,7 @@ class ScrapiusTelegramBot:
                     await asyncio.sleep(0.1)
                     
                 finally:
-                    conn.close()
+                    release_db_connection(conn)
                     
         except KeyboardInterrupt:
             logging.info("🛑 Bot stopped by user")
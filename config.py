@@ -1,17 +1,30 @@
 import os
 from dotenv import load_dotenv
-import getpass
 import logging
 from typing import List, Tuple
 import subprocess
-import shutil
 import stat
 from pathlib import Path
 import platform
+import functools
+from datetime import datetime, timezone, timedelta
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+_LOGGING_CONFIGURED = False
+
+def configure_logging(handlers=None) -> None:
+    """Configure root logging once for the application; later calls are no-ops."""
+    global _LOGGING_CONFIGURED
+    if _LOGGING_CONFIGURED:
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers,
+        force=True
+    )
+    _LOGGING_CONFIGURED = True
 
 # Removed get_google_api_key - Gemini AI is no longer used
 
@@ -21,14 +34,14 @@ def get_facebook_credentials() -> tuple[str, str]:
     Prioritizes environment variables (FB_USER, FB_PASS) for non-interactive use.
     If not found in env, prompts the user securely.
     """
-    fb_user = os.getenv("FB_USER")
-    fb_pass = os.getenv("FB_PASS")
+    fb_user, fb_pass = os.environ.get("FB_USER"), os.environ.get("FB_PASS")
 
     if fb_user and fb_pass:
         logging.info("Loading Facebook credentials from environment variables.")
         return fb_user, fb_pass
     else:
         logging.info("Facebook credentials not found in environment variables. Prompting user.")
+        import getpass
         try:
             username = input("Enter Facebook Email/Username: ")
             password = getpass.getpass("Enter Facebook Password: ")
@@ -219,59 +232,81 @@ def get_working_hours_settings(conn=None) -> dict:
         'working_days': [int(d.strip()) for d in os.getenv("BOT_WORKING_DAYS", "0,1,2,3,4").split(',') if d.strip()],  # Mon-Fri default
     }
 
+# Compiled working-hours settings, keyed by whether they were read from the DB.
+# Cleared by clear_working_hours_cache() whenever a working_hours_* setting is written.
+_WH_CACHE: dict = {}
+
+_DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+def clear_working_hours_cache() -> None:
+    """Drop compiled working-hours settings so the next check re-reads them."""
+    _WH_CACHE.clear()
+
+@functools.lru_cache(maxsize=4)
+def _fixed_tz(offset_hours: int) -> timezone:
+    """Returns a shared fixed-offset tzinfo so cache rebuilds don't allocate a new one."""
+    return timezone(timedelta(hours=offset_hours))
+
+def _wh_compiled(conn=None) -> tuple:
+    """
+    Returns (enabled, tz, start_hour, end_hour, days_mask) for the working-hours check.
+    days_mask has bit N set when weekday N (0=Monday) is a working day.
+    """
+    key = conn is not None
+    compiled = _WH_CACHE.get(key)
+    if compiled is None:
+        settings = get_working_hours_settings(conn)
+        tz = _fixed_tz(settings['timezone_offset'])
+        days_mask = sum(1 << d for d in set(settings['working_days']) if 0 <= d <= 6)
+        compiled = (settings['enabled'], tz, settings['start_hour'], settings['end_hour'], days_mask)
+        _WH_CACHE[key] = compiled
+    return compiled
+
+def _now_and_settings(conn=None) -> tuple:
+    """Returns (now_local, compiled_settings) so callers share one clock read and tz object."""
+    compiled = _wh_compiled(conn)
+    return datetime.now(compiled[1]), compiled
+
+def _is_active_at(now_local: datetime, compiled: tuple) -> bool:
+    enabled, _tz, start_hour, end_hour, days_mask = compiled
+    if not enabled:
+        return True
+    return bool((days_mask >> now_local.weekday()) & 1) and start_hour <= now_local.hour < end_hour
+
 def is_within_working_hours(conn=None) -> bool:
     """
     Check if current time is within configured working hours (GMT+3).
     Returns True if working hours are disabled or if current time is within working hours.
     """
-    from datetime import datetime, timezone, timedelta
-    
-    settings = get_working_hours_settings(conn)
+    compiled = _wh_compiled(conn)
     
     # If working hours are disabled, always return True
-    if not settings['enabled']:
+    if not compiled[0]:
         return True
     
-    # Get current time in the configured timezone
-    tz_offset = timedelta(hours=settings['timezone_offset'])
-    local_tz = timezone(tz_offset)
-    now_local = datetime.now(local_tz)
-    
-    # Check if current day is a working day
-    current_weekday = now_local.weekday()  # 0=Monday, 6=Sunday
-    if current_weekday not in settings['working_days']:
-        return False
-    
-    # Check if current hour is within working hours
-    current_hour = now_local.hour
-    return settings['start_hour'] <= current_hour < settings['end_hour']
+    return _is_active_at(datetime.now(compiled[1]), compiled)
 
 def get_next_working_time(conn=None) -> str:
     """
     Get human-readable description of when bot will next be active.
     """
-    from datetime import datetime, timezone, timedelta
+    now_local, compiled = _now_and_settings(conn)
+    enabled, tz, start_hour, end_hour, days_mask = compiled
     
-    settings = get_working_hours_settings(conn)
-    
-    if not settings['enabled']:
+    if not enabled:
         return "Working hours disabled - bot runs 24/7"
     
-    tz_offset = timedelta(hours=settings['timezone_offset'])
-    local_tz = timezone(tz_offset)
-    now_local = datetime.now(local_tz)
+    tz_offset = int(tz.utcoffset(None) / timedelta(hours=1))
     
     # If currently within working hours
-    if is_within_working_hours(conn):
-        end_time = now_local.replace(hour=settings['end_hour'], minute=0, second=0, microsecond=0)
-        return f"Active until {end_time.strftime('%H:%M')} GMT+{settings['timezone_offset']}"
+    if _is_active_at(now_local, compiled):
+        end_time = now_local.replace(hour=end_hour, minute=0, second=0, microsecond=0)
+        return f"Active until {end_time.strftime('%H:%M')} GMT+{tz_offset}"
     
     # Find next working period
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    working_days_names = [days[d] for d in settings['working_days']]
+    working_days_names = [_DAY_NAMES[d] for d in range(7) if (days_mask >> d) & 1]
     
-    return f"Next active: {working_days_names[0]}-{working_days_names[-1]} {settings['start_hour']:02d}:00-{settings['end_hour']:02d}:00 GMT+{settings['timezone_offset']}"
-
+    return f"Next active: {working_days_names[0]}-{working_days_names[-1]} {start_hour:02d}:00-{end_hour:02d}:00 GMT+{tz_offset}"
 
 def get_cookie_store_path() -> str:
     path = os.getenv("COOKIE_STORE_PATH")
@@ -280,6 +315,34 @@ def get_cookie_store_path() -> str:
     return os.path.abspath(os.path.join(os.path.dirname(__file__), 'fb_cookies.json'))
 
 
+@functools.lru_cache(maxsize=1)
+def _path_index() -> dict[str, str]:
+    """
+    Scan $PATH once and map executable names to their full paths (first match wins, like shutil.which).
+    On Windows, names are also indexed without their PATHEXT extension.
+    """
+    index: dict[str, str] = {}
+    pathext = [ext.lower() for ext in os.environ.get("PATHEXT", "").split(os.pathsep) if ext] if os.name == "nt" else []
+    for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        if not directory:
+            continue
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if not entry.is_file() or not (entry.stat().st_mode & 0o111 or pathext):
+                    continue
+            except OSError:
+                continue
+            index.setdefault(entry.name, entry.path)
+            if pathext:
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in pathext:
+                    index.setdefault(stem, entry.path)
+    return index
+
 def get_chrome_executable_path():
     """
     Get Chrome executable path across different operating systems.
@@ -313,8 +376,9 @@ def get_chrome_executable_path():
             return path
     
     # Try to find in PATH
-    for name in ["google-chrome", "chrome", "chromium", "chromium-browser"]:
-        path = shutil.which(name)
+    path_index = _path_index()
+    for name in ("google-chrome", "chrome", "chromium", "chromium-browser"):
+        path = path_index.get(name)
         if path:
             logging.info(f"🔍 Found Chrome in PATH: {path}")
             return path
@@ -329,7 +393,7 @@ def get_reliable_chromedriver_path() -> str:
     
     try:
         # Try system PATH first (most reliable)
-        chromedriver_path = shutil.which('chromedriver')
+        chromedriver_path = _path_index().get('chromedriver')
         if chromedriver_path:
             logging.info(f"🔍 Found ChromeDriver in PATH: {chromedriver_path}")
             return chromedriver_path
@@ -382,6 +446,70 @@ def get_reliable_chromedriver_path() -> str:
         logging.error(f"Failed to get reliable ChromeDriver: {e}")
         raise RuntimeError("Could not find or fix ChromeDriver installation")
 
+# Chrome command-line flags shared by the remote-debugging launcher and setup_chrome_options
+_STABILITY_FLAGS: tuple[str, ...] = (
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-default-apps',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--metrics-recording-only',
+    '--no-report-upload',
+)
+
+_BACKGROUND_THROTTLING_FLAGS: tuple[str, ...] = (
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+)
+
+_HEADLESS_FLAGS: tuple[str, ...] = (
+    '--headless=new',  # Use new headless mode
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--window-size=1920,1080',
+)
+
+_BASE_CHROME_FLAGS: tuple[str, ...] = _STABILITY_FLAGS + (
+    '--disable-popup-blocking',
+    '--disable-translate',
+) + _BACKGROUND_THROTTLING_FLAGS + (
+    '--disable-features=TranslateUI,VizDisplayCompositor',
+    '--disable-web-security',
+)
+
+_HEADLESS_OPTION_FLAGS: tuple[str, ...] = _HEADLESS_FLAGS + (
+    '--disable-web-security',
+    '--disable-infobars',
+    '--disable-notifications',
+    '--disable-popup-blocking',
+    '--disable-extensions',
+    '--disable-plugins',
+    # '--disable-images',  # Keep images enabled to match manual login
+    '--disable-features=VizDisplayCompositor',
+) + _BACKGROUND_THROTTLING_FLAGS
+
+# Non-headless mode (for VNC/manual login); keep images enabled for manual login
+_VISIBLE_OPTION_FLAGS: tuple[str, ...] = (
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--window-size=1920,1080',
+    '--start-maximized',
+    '--disable-infobars',
+    '--disable-notifications',
+    '--disable-popup-blocking',
+)
+
+# Memory and performance tweaks to reduce detection
+_QUIET_FLAGS: tuple[str, ...] = (
+    '--max_old_space_size=4096',
+    '--disable-logging',
+    '--disable-gpu-logging',
+    '--silent',
+    '--log-level=3',
+)
+
 def create_chrome_with_remote_debugging(headless: bool = True, debug_port: int = 9222):
     """
     BULLETPROOF: Create Chrome with remote debugging - works on ALL platforms.
@@ -411,21 +539,7 @@ def create_chrome_with_remote_debugging(headless: bool = True, debug_port: int =
         user_data_dir, profile_dir = get_chrome_profile_settings()
         
         # Build Chrome command
-        chrome_cmd = [
-            chrome_executable,
-            f'--remote-debugging-port={debug_port}',
-            '--no-first-run',
-            '--no-default-browser-check',
-            '--disable-default-apps',
-            '--disable-popup-blocking',
-            '--disable-translate',
-            '--disable-background-timer-throttling',
-            '--disable-backgrounding-occluded-windows',
-            '--disable-renderer-backgrounding',
-            '--disable-features=TranslateUI,VizDisplayCompositor',
-            '--disable-web-security',
-            '--disable-sync'
-        ]
+        chrome_cmd = [chrome_executable, f'--remote-debugging-port={debug_port}', *_BASE_CHROME_FLAGS]
         
         if user_data_dir:
             chrome_cmd.append(f'--user-data-dir={user_data_dir}')
@@ -433,14 +547,8 @@ def create_chrome_with_remote_debugging(headless: bool = True, debug_port: int =
             chrome_cmd.append(f'--profile-directory={profile_dir}')
         
         if headless:
-            chrome_cmd.extend([
-                '--headless=new',
-                '--no-sandbox',
-                '--disable-dev-shm-usage',
-                '--disable-gpu',
-                '--window-size=1920,1080',
-                '--disable-images'
-            ])
+            chrome_cmd.extend(_HEADLESS_FLAGS)
+            chrome_cmd.append('--disable-images')
         
         # Start Chrome with remote debugging
         logging.info(f"🚀 Starting Chrome with remote debugging on port {debug_port}")
@@ -528,43 +636,10 @@ def setup_chrome_options(headless: bool = True, user_data_dir: str = None, profi
     if profile_dir:
         options.add_argument(f"--profile-directory={profile_dir}")
     
-    # Robust headless configuration
-    if headless:
-        options.add_argument('--headless=new')  # Use new headless mode
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-infobars')
-        options.add_argument('--disable-notifications')
-        options.add_argument('--disable-popup-blocking')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-plugins')
-        # options.add_argument('--disable-images')  # Keep images enabled to match manual login
-        options.add_argument('--disable-features=VizDisplayCompositor')
-        options.add_argument('--disable-background-timer-throttling')
-        options.add_argument('--disable-backgrounding-occluded-windows')
-        options.add_argument('--disable-renderer-backgrounding')
-    else:
-        # Non-headless mode (for VNC/manual login)
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--start-maximized')
-        options.add_argument('--disable-infobars')
-        options.add_argument('--disable-notifications')
-        # Keep images enabled for manual login
-        options.add_argument('--disable-popup-blocking')
-    
-    # Essential stability options
-    options.add_argument('--no-first-run')
-    options.add_argument('--no-default-browser-check')
-    options.add_argument('--disable-default-apps')
-    options.add_argument('--disable-background-networking')
-    options.add_argument('--disable-sync')
-    options.add_argument('--metrics-recording-only')
-    options.add_argument('--no-report-upload')
+    # Robust headless configuration (or non-headless for VNC/manual login),
+    # followed by essential stability options
+    for flag in (_HEADLESS_OPTION_FLAGS if headless else _VISIBLE_OPTION_FLAGS) + _STABILITY_FLAGS:
+        options.add_argument(flag)
     
     # Enhanced browser fingerprinting to match your local browser
     options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.7339.80 Safari/537.36")
@@ -600,11 +675,8 @@ def setup_chrome_options(headless: bool = True, user_data_dir: str = None, profi
         options.add_argument(f'--window-size={width},{height}')
     
     # Memory and performance tweaks to reduce detection
-    options.add_argument('--max_old_space_size=4096')
-    options.add_argument('--disable-logging')
-    options.add_argument('--disable-gpu-logging')
-    options.add_argument('--silent')
-    options.add_argument('--log-level=3')
+    for flag in _QUIET_FLAGS:
+        options.add_argument(flag)
     
 
     
@@ -2,10 +2,10 @@ import sqlite3
 import json
 import time
 import logging
+import queue
+from contextlib import contextmanager
 from typing import List, Dict, Optional, Union
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 ALLOWED_FILTER_FIELDS = {
     'ai_category',
     'post_author_name',
@@ -17,13 +17,65 @@ def get_db_connection(db_name='insights.db'):
     Creates and returns a connection to the SQLite database.
     """
     try:
-        conn = sqlite3.connect(db_name)
-        conn.row_factory = sqlite3.Row
-        return conn
+        from database.simple_per_group import configure_connection
+        # Per-group tables each have their own SQL text; keep enough prepared statements cached for all of them
+        conn = sqlite3.connect(db_name, cached_statements=512)
+        return configure_connection(conn)
     except sqlite3.Error as e:
         logging.error(f"Database connection error: {e}")
         return None
 
+# (db_name, readonly) -> idle pooled connections; opened with check_same_thread=False so any worker can reuse them.
+# Read-only connections never take the write lock, so under WAL they don't wait on the scraper's writes.
+_POOLS: Dict[tuple, queue.LifoQueue] = {}
+_POOL_MAX_IDLE = 4
+
+def _pool(db_name: str, readonly: bool) -> queue.LifoQueue:
+    return _POOLS.setdefault((db_name, readonly), queue.LifoQueue(maxsize=_POOL_MAX_IDLE))
+
+def acquire_db_connection(db_name='insights.db', readonly=False):
+    """
+    Takes an idle connection from the pool, or opens a new one if none is idle.
+    Pass readonly=True for lookups that never write (opened with SQLite's mode=ro).
+    Hand it back with release_db_connection() instead of closing it.
+    """
+    try:
+        return _pool(db_name, readonly).get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        from database.simple_per_group import configure_connection
+        if readonly:
+            conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True, cached_statements=512, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(db_name, cached_statements=512, check_same_thread=False)
+        return configure_connection(conn)
+    except sqlite3.Error as e:
+        logging.error(f"Database connection error: {e}")
+        return None
+
+def release_db_connection(conn, db_name='insights.db', readonly=False):
+    """
+    Returns a connection from acquire_db_connection() to the pool (closing it if the pool is full).
+    """
+    if conn is None:
+        return
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool(db_name, readonly).put_nowait(conn)
+    except (queue.Full, sqlite3.Error):
+        conn.close()
+
+@contextmanager
+def pooled_db_connection(db_name='insights.db', readonly=False):
+    """Context manager around acquire_db_connection()/release_db_connection()."""
+    conn = acquire_db_connection(db_name, readonly)
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn, db_name, readonly)
+
 def add_scraped_post(db_conn: sqlite3.Connection, post_data: Dict, group_id: int) -> Optional[tuple[int, bool]]:
     """
     Inserts a new scraped post into the database for a specific group.
@@ -519,6 +571,8 @@ def remove_group(db_conn: sqlite3.Connection, group_id: int) -> bool:
         cursor = db_conn.cursor()
         cursor.execute(sql, (group_id,))
         db_conn.commit()
+        from database.simple_per_group import clear_group_cache
+        clear_group_cache(group_id)
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         logging.error(f"Error removing group {group_id}: {e}")
@@ -540,6 +594,9 @@ def botsettings_set(db_conn: sqlite3.Connection, key: str, value: str) -> None:
         cursor = db_conn.cursor()
         cursor.execute("INSERT INTO BotSettings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, value))
         db_conn.commit()
+        if key.startswith('working_hours_'):
+            from config import clear_working_hours_cache
+            clear_working_hours_cache()
     except sqlite3.Error:
         db_conn.rollback()
 
@@ -1,7 +1,23 @@
 import sqlite3
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Note: Legacy Posts and Comments tables removed in cleanup
+# Current bot uses per-group tables (Posts_Group_XXX) created dynamically
+_SCHEMA_DDL = '''
+    CREATE TABLE IF NOT EXISTS Groups (
+        group_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        group_name TEXT UNIQUE NOT NULL,
+        group_url TEXT UNIQUE NOT NULL,
+        table_name TEXT UNIQUE NOT NULL,
+        last_scraped_at TIMESTAMP,
+        post_count INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS BotSettings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+'''
 
 def init_db(db_name='insights.db'):
     """
@@ -13,39 +29,24 @@ def init_db(db_name='insights.db'):
     """
     conn = None
     try:
-        conn = sqlite3.connect(db_name)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Groups (
-                group_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                group_name TEXT UNIQUE NOT NULL,
-                group_url TEXT UNIQUE NOT NULL,
-                table_name TEXT UNIQUE NOT NULL,
-                last_scraped_at TIMESTAMP
-            )
-        ''')
-
-        # Note: Legacy Posts and Comments tables removed in cleanup
-        # Current bot uses per-group tables (Posts_Group_XXX) created dynamically
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS BotSettings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-
-        conn.commit()
+        # Switch the file to WAL here so it is persisted before the bot or any script opens it
+        from database.simple_per_group import configure_connection
+        conn = configure_connection(sqlite3.connect(db_name))
+        with conn:
+            conn.executescript(_SCHEMA_DDL)
+        
+        # Older databases: add Groups.post_count and bring existing group tables up to date
+        from database.simple_per_group import migrate_group_tables
+        migrate_group_tables(conn)
         logging.info(f"Database '{db_name}' initialized with Groups and Posts tables created or verified.")
 
     except sqlite3.Error as e:
         logging.error(f"Database error: {e}")
-        if conn:
-            conn.rollback()
     finally:
         if conn:
             conn.close()
 
 if __name__ == '__main__':
-    init_db() 
\ No newline at end of file
+    from config import configure_logging
+    configure_logging()
+    init_db()
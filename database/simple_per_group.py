@@ -1,10 +1,127 @@
 import sqlite3
 import logging
+import time
+from datetime import datetime, timezone
 import re
-from typing import Dict, Optional, Tuple, List
+import hashlib
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple, List
 # Selenium imports moved to function level to avoid import issues
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Module logger; logging itself is configured by the entry point (config.configure_logging)
+log = logging.getLogger(__name__)
+
+_GROUP_ID_RE = re.compile(r'/groups/(\d+)')
+
+# Facebook UI labels that show up in place of a group name ('home'/'members' in any case)
+_GROUP_NAME_REJECT_RE = re.compile(r'Facebook|See all|More|Join|Invite|Search|(?i:home|members|log in)')
+
+# Group page titles look like "(3) Group Name | Facebook"; the "(N) " prefix is the notification count
+_GROUP_TITLE_RE = re.compile(r'^(?:\(\d+\)\s*)?(.+?)\s*\|\s*Facebook\s*$')
+
+def _is_plausible_group_name(text: str) -> bool:
+    """Filter out common Facebook UI elements picked up instead of the group name."""
+    return 2 < len(text) < 150 and not text.isdigit() and not _GROUP_NAME_REJECT_RE.search(text)
+
+# Per-connection tuning: WAL turns each commit into a log append instead of a rollback-journal fsync.
+# WAL relies on shared memory, so insights.db must live on a local filesystem (not NFS/SMB).
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_spill=0",  # keep a batch's dirty pages in memory until COMMIT
+    "PRAGMA journal_size_limit=67108864",  # truncate the WAL back to 64MB after a checkpoint
+)
+
+def configure_connection(db_conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Apply WAL journaling and cache PRAGMAs to a connection (call once right after opening it).
+    Also installs sqlite3.Row as the row factory, which dict(row) conversions here rely on.
+    
+    Args:
+        db_conn: Database connection
+        
+    Returns:
+        The same connection, for chaining
+    """
+    db_conn.row_factory = sqlite3.Row
+    for pragma in _CONNECTION_PRAGMAS:
+        try:
+            db_conn.execute(pragma)
+        except sqlite3.Error as e:
+            # journal_mode is persistent and can fail on read-only or locked files; keep going
+            log.debug("Could not apply '%s': %s", pragma, e)
+    return db_conn
+
+# id(connection) -> table suffixes inserted into, for each connection inside group_write_txn().
+# Keyed by id() because sqlite3.Connection can't be weakly referenced; an entry only lives
+# while its context (and so the connection) is open. Write helpers on these connections
+# leave commit/rollback to the context.
+_ACTIVE_TXNS: Dict[int, set] = {}
+
+@contextmanager
+def group_write_txn(db_conn: sqlite3.Connection):
+    """
+    Run several writes in one IMMEDIATE transaction (one commit/fsync instead of one per row).
+    mark_post_as_processed, update_ai_result and add_posts_to_group skip their own commit inside it.
+    
+    Args:
+        db_conn: Database connection
+        
+    Yields:
+        The same connection
+    """
+    key = id(db_conn)
+    if key in _ACTIVE_TXNS:
+        # Nested use joins the outer transaction
+        yield db_conn
+        return
+    
+    if not db_conn.in_transaction:
+        db_conn.execute("BEGIN IMMEDIATE")
+    touched = _ACTIVE_TXNS[key] = set()
+    try:
+        yield db_conn
+        db_conn.commit()
+    except BaseException:
+        db_conn.rollback()
+        # Inserts noted in the in-process caches for these tables never reached them
+        for table_suffix in touched:
+            _HASH_SETS.pop(table_suffix, None)
+            _LATEST_CACHE.pop(table_suffix, None)
+        raise
+    finally:
+        _ACTIVE_TXNS.pop(key, None)
+
+def _commit(db_conn: sqlite3.Connection) -> None:
+    if id(db_conn) not in _ACTIVE_TXNS:
+        db_conn.commit()
+
+def _rollback(db_conn: sqlite3.Connection) -> None:
+    if id(db_conn) not in _ACTIVE_TXNS:
+        db_conn.rollback()
+
+# Group name selectors, most specific first
+_GROUP_NAME_SELECTORS = (
+    'h1[dir="auto"] span a',  # Most specific: h1 > span > a (contains actual name)
+    'h1[dir="auto"] a',      # Fallback: direct h1 > a
+    'h1 a[href*="/groups/"]', # More specific: h1 > a with groups href
+    'h1[dir="auto"]',        # Fallback: entire h1
+    'h1 a',                  # Generic: any h1 > a
+    'h1'                     # Last resort: any h1
+)
+
+# Text of the first match for every selector, in one WebDriver round trip (null where nothing matches)
+_GROUP_NAME_JS = """
+return arguments[0].map(function (selector) {
+    var element = document.querySelector(selector);
+    return element ? element.innerText : null;
+});
+"""
 
 def _scrape_group_name_from_page(driver) -> Optional[str]:
     """
@@ -17,78 +134,226 @@ def _scrape_group_name_from_page(driver) -> Optional[str]:
         Group name if found, None otherwise
     """
     # Import Selenium only when needed
-    from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
     try:
-        logging.info(f"🔍 Starting group name extraction. Current URL: {driver.current_url}")
-        
-        # Enhanced selectors for Facebook group names (based on actual FB structure)
-        selectors = [
-            'h1[dir="auto"] span a',  # Most specific: h1 > span > a (contains actual name)
-            'h1[dir="auto"] a',      # Fallback: direct h1 > a
-            'h1 a[href*="/groups/"]', # More specific: h1 > a with groups href
-            'h1[dir="auto"]',        # Fallback: entire h1
-            'h1 a',                  # Generic: any h1 > a
-            'h1'                     # Last resort: any h1
-        ]
-        
-        for selector in selectors:
-            try:
-                logging.debug(f"🔍 Trying selector: {selector}")
-                element = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
-                text = element.text.strip()
-                logging.debug(f"📝 Found text with selector '{selector}': '{text}'")
-                
-                # Filter out common Facebook UI elements and improve validation
-                if (text and 
-                    len(text) > 2 and 
-                    len(text) < 150 and
-                    'Facebook' not in text and
-                    'See all' not in text and
-                    'More' not in text and
-                    'home' not in text.lower() and
-                    'Join' not in text and
-                    'Invite' not in text and
-                    'Search' not in text and
-                    not text.isdigit() and
-                    'members' not in text.lower()):
-                    
-                    logging.info(f"✅ Scraped group name: '{text}' using selector: {selector}")
-                    return text
-                else:
-                    logging.debug(f"❌ Text '{text}' filtered out (doesn't meet criteria)")
-                    
-            except (TimeoutException, NoSuchElementException) as e:
-                logging.debug(f"❌ Selector '{selector}' failed: {e}")
-                continue
-                
-        logging.warning("❌ Could not scrape group name from page")
-        return None
+        if log.isEnabledFor(logging.INFO):
+            # current_url is a WebDriver round trip; skip it when INFO is filtered out
+            log.info("🔍 Starting group name extraction. Current URL: %s", driver.current_url)
+        
+        # Cheapest source first: the page title needs no DOM queries or waiting
+        title_match = _GROUP_TITLE_RE.match(driver.title or '')
+        text = title_match.group(1).strip() if title_match else ''
+        if text and _is_plausible_group_name(text):
+            log.info("✅ Scraped group name: '%s' from page title", text)
+            return text
+        
+        def first_valid_name(d):
+            # One script call per poll; pick the first plausible text in selector priority order
+            texts = d.execute_script(_GROUP_NAME_JS, list(_GROUP_NAME_SELECTORS)) or []
+            for selector, text in zip(_GROUP_NAME_SELECTORS, texts):
+                if text is None:
+                    continue
+                text = text.strip()
+                if _is_plausible_group_name(text):
+                    return selector, text
+                log.debug("❌ Text '%s' from selector '%s' filtered out (doesn't meet criteria)", text, selector)
+            return False
+        
+        try:
+            # Single 5s wait polling all selectors, instead of up to 5s per selector
+            selector, text = WebDriverWait(
+                driver, 5, ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+            ).until(first_valid_name)
+            log.info("✅ Scraped group name: '%s' using selector: %s", text, selector)
+            return text
+        except TimeoutException:
+            log.warning("❌ Could not scrape group name from page")
+            return None
         
     except Exception as e:
-        logging.error(f"Error scraping group name: {e}")
+        log.error("Error scraping group name: %s", e)
         return None
 
+@functools.lru_cache(maxsize=2048)
 def sanitize_table_name(group_url: str) -> str:
     """
     Generate a safe table name from group URL.
     Example: 'https://facebook.com/groups/501702489979518' -> 'Group_501702489979518'
     """
     # Extract numeric ID from URL
-    match = re.search(r'/groups/(\d+)', group_url)
+    match = _GROUP_ID_RE.search(group_url)
     if match:
         group_numeric_id = match.group(1)
         return f"Group_{group_numeric_id}"
     else:
-        # Fallback: use hash of URL
-        import hashlib
-        url_hash = hashlib.md5(group_url.encode()).hexdigest()[:10]
+        # Fallback: use hash of URL (5-byte digest -> 10 hex chars)
+        url_hash = hashlib.blake2s(group_url.encode(), digest_size=5).hexdigest()
         return f"Group_{url_hash}"
 
+# Table suffixes come from sanitize_table_name(); anything else must never reach SQL text
+_VALID_SUFFIX_RE = re.compile(r'^Group_[A-Za-z0-9_]{1,64}$')
+
+class InvalidTableSuffixError(sqlite3.ProgrammingError, ValueError):
+    """Unsafe group table suffix. A sqlite3.Error, so helpers keep their return-None/False error path."""
+
+@functools.lru_cache(maxsize=256)
+def _posts_table(table_suffix: str) -> str:
+    """Validated Posts_* table name for a group suffix."""
+    if not _VALID_SUFFIX_RE.match(table_suffix):
+        raise InvalidTableSuffixError(f"Invalid group table suffix: {table_suffix!r}")
+    return f"Posts_{table_suffix}"
+
+@functools.lru_cache(maxsize=256)
+def _processed_table(table_suffix: str) -> str:
+    """Validated Processed_* table name for a group suffix."""
+    if not _VALID_SUFFIX_RE.match(table_suffix):
+        raise InvalidTableSuffixError(f"Invalid group table suffix: {table_suffix!r}")
+    return f"Processed_{table_suffix}"
+
+# Per-table SQL text, formatted once per table suffix. Identical SQL strings also let
+# sqlite3's statement cache reuse the compiled statement instead of re-preparing it.
+@functools.lru_cache(maxsize=256)
+def _sql_insert(table_suffix: str) -> str:
+    # Parameters follow _post_row(); timestamps are supplied by the client, once per batch
+    return f"""
+        INSERT OR IGNORE INTO {_posts_table(table_suffix)} (
+            facebook_post_id, post_url, post_content_raw, content_hash, ai_relevant, ai_processed_at, scraped_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+# RETURNING needs SQLite 3.35+; older libraries use the batch path for single rows too
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+@functools.lru_cache(maxsize=256)
+def _sql_insert_returning(table_suffix: str) -> str:
+    # An ignored duplicate returns no row, so no rowcount/lastrowid check is needed
+    return _sql_insert(table_suffix) + " RETURNING internal_post_id"
+
+@functools.lru_cache(maxsize=256)
+def _sql_latest_facebook_post_id(table_suffix: str) -> str:
+    return f"""
+        SELECT facebook_post_id FROM {_posts_table(table_suffix)} 
+        WHERE facebook_post_id IS NOT NULL AND facebook_post_id != ''
+        AND facebook_post_id NOT LIKE 'generated_%'
+        ORDER BY internal_post_id DESC
+        LIMIT 1
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_latest_hash(table_suffix: str) -> str:
+    return f"""
+        SELECT content_hash FROM {_posts_table(table_suffix)} 
+        WHERE content_hash IS NOT NULL AND content_hash != ''
+        ORDER BY internal_post_id DESC
+        LIMIT 1
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_latest_url(table_suffix: str) -> str:
+    return f"""
+        SELECT post_url FROM {_posts_table(table_suffix)} 
+        WHERE post_url IS NOT NULL AND post_url != ''
+        ORDER BY internal_post_id DESC
+        LIMIT 1
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_latest_real_post_url(table_suffix: str) -> str:
+    # Only real Facebook post URLs, not group URLs or generated ones
+    return f"""
+        SELECT post_url FROM {_posts_table(table_suffix)} 
+        WHERE post_url NOT LIKE '%no_url_generated_%'
+        AND post_url LIKE '%facebook.com%'
+        AND post_url LIKE '%/posts/%'
+        ORDER BY internal_post_id DESC 
+        LIMIT 1
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_latest_markers(table_suffix: str) -> str:
+    # Same filters as the three get_most_recent_* helpers, answered in one statement
+    return f"""
+        SELECT
+            ({_sql_latest_facebook_post_id(table_suffix)}),
+            ({_sql_latest_hash(table_suffix)}),
+            ({_sql_latest_url(table_suffix)})
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_group_posts(table_suffix: str) -> str:
+    return f"""
+        SELECT * FROM {_posts_table(table_suffix)} 
+        ORDER BY internal_post_id DESC 
+        LIMIT ?
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_all_hashes(table_suffix: str) -> str:
+    return f"SELECT content_hash FROM {_posts_table(table_suffix)} WHERE content_hash IS NOT NULL"
+
+@functools.lru_cache(maxsize=256)
+def _sql_unprocessed_posts(table_suffix: str) -> str:
+    return f"""
+        SELECT internal_post_id, facebook_post_id, post_url, post_content_raw, content_hash
+        FROM {_posts_table(table_suffix)}
+        WHERE ai_relevant IS NULL
+        ORDER BY internal_post_id ASC
+        LIMIT ?
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_update_ai_result(table_suffix: str) -> str:
+    return f"""
+        UPDATE {_posts_table(table_suffix)}
+        SET ai_relevant = ?, ai_processed_at = CURRENT_TIMESTAMP
+        WHERE internal_post_id = ?
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_mark_processed(table_suffix: str) -> str:
+    return f"""
+        INSERT OR REPLACE INTO {_processed_table(table_suffix)} 
+        (content_hash, facebook_post_id, was_ai_relevant) 
+        VALUES (?, ?, ?)
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_latest_processed_hash(table_suffix: str) -> str:
+    return f"""
+        SELECT content_hash FROM {_processed_table(table_suffix)} 
+        WHERE content_hash IS NOT NULL AND content_hash != ''
+        ORDER BY processed_at DESC
+        LIMIT 1
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_newly_relevant(table_suffix: str) -> str:
+    return f"""
+        SELECT internal_post_id, facebook_post_id, post_url, post_content_raw
+        FROM {_posts_table(table_suffix)}
+        WHERE ai_relevant = 1 
+        AND scraped_at >= datetime('now', ?)
+        ORDER BY internal_post_id ASC
+    """
+
+@functools.lru_cache(maxsize=256)
+def _sql_processed_exists(table_suffix: str) -> str:
+    return f"SELECT 1 FROM {_processed_table(table_suffix)} WHERE content_hash = ? LIMIT 1"
+
+# Columns added after the first release: (name, column definition) for ALTER TABLE on legacy tables
+_LEGACY_POST_COLUMNS = (
+    ('content_hash', 'TEXT'),
+    ('ai_relevant', 'INTEGER DEFAULT NULL'),
+    ('ai_processed_at', 'TIMESTAMP DEFAULT NULL'),
+)
+
+# Table suffixes whose Posts_* table this process has already created/migrated
+_MIGRATED: set = set()
+
+# Stored in PRAGMA user_version once every group table is migrated; bump when create_group_posts_table changes
+_SCHEMA_VERSION = 3
+
 def create_group_posts_table(db_conn: sqlite3.Connection, table_suffix: str) -> bool:
     """
     Create Posts table for a specific group.
@@ -100,9 +365,13 @@ def create_group_posts_table(db_conn: sqlite3.Connection, table_suffix: str) ->
     Returns:
         True if successful, False otherwise
     """
+    if table_suffix in _MIGRATED:
+        # Already created and migrated by this process
+        return True
+    
     try:
         cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
+        posts_table = _posts_table(table_suffix)
         
         # Create Posts table for this group (NO COMMENTS!)
         cursor.execute(f'''
@@ -118,36 +387,135 @@ def create_group_posts_table(db_conn: sqlite3.Connection, table_suffix: str) ->
             )
         ''')
         
-        # Add content_hash column if it doesn't exist (for existing tables)
-        try:
-            cursor.execute(f"ALTER TABLE {posts_table} ADD COLUMN content_hash TEXT")
-            logging.info(f"✅ Added content_hash column to {posts_table}")
-        except sqlite3.OperationalError:
-            # Column already exists, which is fine
-            pass
+        # Add columns missing from existing (legacy) tables
+        cursor.execute(f"PRAGMA table_info({posts_table})")
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        for column, column_ddl in _LEGACY_POST_COLUMNS:
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE {posts_table} ADD COLUMN {column} {column_ddl}")
+                log.info("✅ Added %s column to %s", column, posts_table)
         
-        # Add ai_relevant column if it doesn't exist (for existing tables)
+        # Enforce hash uniqueness on legacy tables too (ALTER TABLE ADD COLUMN can't add UNIQUE)
         try:
-            cursor.execute(f"ALTER TABLE {posts_table} ADD COLUMN ai_relevant INTEGER DEFAULT NULL")
-            logging.info(f"✅ Added ai_relevant column to {posts_table}")
-        except sqlite3.OperationalError:
-            # Column already exists, which is fine
-            pass
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{posts_table}_hash ON {posts_table}(content_hash)")
+        except sqlite3.IntegrityError as e:
+            # Legacy table already holds duplicate hashes; keep the oldest row of each and retry,
+            # so INSERT OR IGNORE can dedupe again (a second failure aborts and leaves the table unmigrated)
+            log.warning("⚠️ Duplicate hashes in %s (%s); removing newer copies", posts_table, e)
+            cursor.execute(f"""
+                DELETE FROM {posts_table}
+                WHERE content_hash IS NOT NULL
+                AND internal_post_id NOT IN (
+                    SELECT MIN(internal_post_id) FROM {posts_table}
+                    WHERE content_hash IS NOT NULL
+                    GROUP BY content_hash
+                )
+            """)
+            log.info("🧹 Removed %s duplicate posts from %s", cursor.rowcount, posts_table)
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{posts_table}_hash ON {posts_table}(content_hash)")
+        
+        # Partial indexes so the "latest real post" lookups read the tail of a small index
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{posts_table}_real_fbid ON {posts_table}(internal_post_id DESC)
+            WHERE facebook_post_id IS NOT NULL AND facebook_post_id != ''
+            AND facebook_post_id NOT LIKE 'generated_%'
+        """)
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{posts_table}_real_url ON {posts_table}(internal_post_id DESC)
+            WHERE post_url NOT LIKE '%no_url_generated_%'
+            AND post_url LIKE '%facebook.com%'
+            AND post_url LIKE '%/posts/%'
+        """)
+        # get_unprocessed_posts walks only the AI backlog instead of the whole table
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{posts_table}_unprocessed ON {posts_table}(internal_post_id)
+            WHERE ai_relevant IS NULL
+        """)
+        # Date-range scans (e.g. today's posts) seek instead of reading every row
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{posts_table}_scraped_at ON {posts_table}(scraped_at)")
+        
+        _ensure_post_count_triggers(cursor, table_suffix)
+        
+        db_conn.commit()
+        _MIGRATED.add(table_suffix)
+        log.info("✅ Created table %s", posts_table)
+        return True
+        
+    except sqlite3.Error as e:
+        log.error("❌ Error creating group table: %s", e)
+        db_conn.rollback()
+        return False
+
+def _ensure_post_count_triggers(cursor: sqlite3.Cursor, table_suffix: str) -> None:
+    """Keep Groups.post_count in sync with Posts_{suffix}; backfills the count when the triggers are first added."""
+    posts_table = _posts_table(table_suffix)
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+        (f"trg_{table_suffix}_ins",)
+    )
+    if cursor.fetchone():
+        return
+    
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table_suffix}_ins AFTER INSERT ON {posts_table}
+        BEGIN
+            UPDATE Groups SET post_count = post_count + 1 WHERE table_name = '{table_suffix}';
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table_suffix}_del AFTER DELETE ON {posts_table}
+        BEGIN
+            UPDATE Groups SET post_count = post_count - 1 WHERE table_name = '{table_suffix}';
+        END
+    """)
+    cursor.execute(
+        f"UPDATE Groups SET post_count = (SELECT COUNT(*) FROM {posts_table}) WHERE table_name = ?",
+        (table_suffix,)
+    )
+
+def migrate_group_tables(db_conn: sqlite3.Connection) -> bool:
+    """
+    Bring an older database up to date: add Groups.post_count, then run create_group_posts_table
+    on every existing group table so it gets missing columns, indexes and count triggers.
+    
+    Args:
+        db_conn: Database connection
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        cursor = db_conn.cursor()
+        cursor.execute("""
+            SELECT g.table_name FROM Groups g
+            JOIN sqlite_master m ON m.type = 'table' AND m.name = 'Posts_' || g.table_name
+        """)
+        table_suffixes = [row[0] for row in cursor.fetchall()]
+        
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] >= _SCHEMA_VERSION:
+            # An earlier run already migrated everything; tables created since then are current
+            _MIGRATED.update(table_suffixes)
+            return True
         
-        # Add ai_processed_at column if it doesn't exist (for existing tables)
         try:
-            cursor.execute(f"ALTER TABLE {posts_table} ADD COLUMN ai_processed_at TIMESTAMP DEFAULT NULL")
-            logging.info(f"✅ Added ai_processed_at column to {posts_table}")
+            cursor.execute("ALTER TABLE Groups ADD COLUMN post_count INTEGER NOT NULL DEFAULT 0")
+            log.info("✅ Added post_count column to Groups")
         except sqlite3.OperationalError:
             # Column already exists, which is fine
             pass
-        
         db_conn.commit()
-        logging.info(f"✅ Created table {posts_table}")
-        return True
+        
+        migrated = all(create_group_posts_table(db_conn, table_suffix) for table_suffix in table_suffixes)
+        if migrated:
+            cursor.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        
+        # Refresh planner statistics for tables whose indexes changed (ANALYZE only where needed)
+        cursor.execute("PRAGMA optimize")
+        return migrated
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error creating group table: {e}")
+        log.error("❌ Error migrating group tables: %s", e)
         db_conn.rollback()
         return False
 
@@ -165,7 +533,7 @@ def create_processed_posts_table(db_conn: sqlite3.Connection, table_suffix: str)
     """
     try:
         cursor = db_conn.cursor()
-        processed_table = f"Processed_{table_suffix}"
+        processed_table = _processed_table(table_suffix)
         
         cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS {processed_table} (
@@ -175,13 +543,15 @@ def create_processed_posts_table(db_conn: sqlite3.Connection, table_suffix: str)
                 was_ai_relevant BOOLEAN DEFAULT FALSE
             )
         ''')
+        # get_most_recent_processed_hash orders by processed_at
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{processed_table}_processed_at ON {processed_table}(processed_at)")
         
         db_conn.commit()
-        logging.info(f"✅ Created processed posts table {processed_table}")
+        log.info("✅ Created processed posts table %s", processed_table)
         return True
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error creating processed posts table: {e}")
+        log.error("❌ Error creating processed posts table: %s", e)
         db_conn.rollback()
         return False
 
@@ -199,22 +569,35 @@ def mark_post_as_processed(db_conn: sqlite3.Connection, table_suffix: str, conte
     Returns:
         True if successful, False otherwise
     """
+    return mark_posts_as_processed_bulk(db_conn, table_suffix, [(content_hash, facebook_post_id, was_relevant)])
+
+def mark_posts_as_processed_bulk(db_conn: sqlite3.Connection, table_suffix: str, rows: List[Tuple[str, Optional[str], bool]]) -> bool:
+    """
+    Mark many posts as processed in a single transaction.
+    
+    Args:
+        db_conn: Database connection
+        table_suffix: Group table suffix
+        rows: (content_hash, facebook_post_id, was_relevant) tuples
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if not rows:
+        return True
+    
     try:
         cursor = db_conn.cursor()
-        processed_table = f"Processed_{table_suffix}"
-        
-        cursor.execute(f'''
-            INSERT OR REPLACE INTO {processed_table} 
-            (content_hash, facebook_post_id, was_ai_relevant) 
-            VALUES (?, ?, ?)
-        ''', (content_hash, facebook_post_id, was_relevant))
+        if not db_conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        cursor.executemany(_sql_mark_processed(table_suffix), rows)
         
-        db_conn.commit()
+        _commit(db_conn)
         return True
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error marking post as processed: {e}")
-        db_conn.rollback()
+        log.error("❌ Error marking posts as processed: %s", e)
+        _rollback(db_conn)
         return False
 
 def get_most_recent_processed_hash(db_conn: sqlite3.Connection, table_suffix: str) -> str | None:
@@ -230,21 +613,11 @@ def get_most_recent_processed_hash(db_conn: sqlite3.Connection, table_suffix: st
         Most recent processed content hash or None if no posts processed
     """
     try:
-        cursor = db_conn.cursor()
-        processed_table = f"Processed_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT content_hash FROM {processed_table} 
-            WHERE content_hash IS NOT NULL AND content_hash != ''
-            ORDER BY processed_at DESC
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
+        result = db_conn.execute(_sql_latest_processed_hash(table_suffix)).fetchone()
         return result[0] if result else None
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error getting most recent processed hash from {table_suffix}: {e}")
+        log.error("❌ Error getting most recent processed hash from %s: %s", table_suffix, e)
         return None
 
 def is_post_already_processed(db_conn: sqlite3.Connection, table_suffix: str, content_hash: str) -> bool:
@@ -260,21 +633,34 @@ def is_post_already_processed(db_conn: sqlite3.Connection, table_suffix: str, co
         True if already processed, False otherwise
     """
     try:
-        cursor = db_conn.cursor()
-        processed_table = f"Processed_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT 1 FROM {processed_table} 
-            WHERE content_hash = ?
-            LIMIT 1
-        """, (content_hash,))
-        
-        return cursor.fetchone() is not None
+        return db_conn.execute(_sql_processed_exists(table_suffix), (content_hash,)).fetchone() is not None
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error checking if post processed: {e}")
+        log.error("❌ Error checking if post processed: %s", e)
         return False
 
+# group_url -> (group_id, table_suffix); Groups rows only change via get_or_create_group and drops
+_GROUP_CACHE: Dict[str, Tuple[int, str]] = {}
+_GROUP_CACHE_LOCK = threading.Lock()
+
+def _remember_group(group_url: str, group_id: int, table_suffix: str) -> Tuple[int, str]:
+    # Validate the suffix once here (InvalidTableSuffixError if unsafe); later _posts_table() calls are cache hits
+    _posts_table(table_suffix)
+    _processed_table(table_suffix)
+    with _GROUP_CACHE_LOCK:
+        _GROUP_CACHE[group_url] = (group_id, table_suffix)
+    return group_id, table_suffix
+
+def clear_group_cache(group_id: int = None) -> None:
+    """Forget cached group lookups (all of them, or only those for group_id)."""
+    with _GROUP_CACHE_LOCK:
+        if group_id is None:
+            _GROUP_CACHE.clear()
+            return
+        for group_url, (cached_id, _) in list(_GROUP_CACHE.items()):
+            if cached_id == group_id:
+                del _GROUP_CACHE[group_url]
+
 def get_or_create_group(db_conn: sqlite3.Connection, group_url: str, group_name: str = None, driver=None) -> Tuple[int, str]:
     """
     Get existing group or create new one with dedicated posts table.
@@ -288,6 +674,10 @@ def get_or_create_group(db_conn: sqlite3.Connection, group_url: str, group_name:
     Returns:
         Tuple of (group_id, table_suffix)
     """
+    cached = _GROUP_CACHE.get(group_url)
+    if cached:
+        return cached
+    
     try:
         cursor = db_conn.cursor()
         
@@ -297,8 +687,8 @@ def get_or_create_group(db_conn: sqlite3.Connection, group_url: str, group_name:
         
         if result:
             group_id, table_suffix = result
-            logging.info(f"📋 Found existing group {group_id} -> {table_suffix}")
-            return group_id, table_suffix
+            log.info("📋 Found existing group %s -> %s", group_id, table_suffix)
+            return _remember_group(group_url, group_id, table_suffix)
         
         # Create new group
         table_suffix = sanitize_table_name(group_url)
@@ -306,59 +696,114 @@ def get_or_create_group(db_conn: sqlite3.Connection, group_url: str, group_name:
         if not group_name:
             # Try to scrape group name from Facebook if driver is provided
             if driver:
-                logging.info(f"🔍 Attempting to scrape group name from Facebook page...")
+                log.info("🔍 Attempting to scrape group name from Facebook page...")
                 group_name = _scrape_group_name_from_page(driver)
                 if group_name:
-                    logging.info(f"✅ Successfully scraped group name: '{group_name}'")
+                    log.info("✅ Successfully scraped group name: '%s'", group_name)
                 else:
-                    logging.warning(f"❌ Failed to scrape group name from Facebook page")
+                    log.warning("❌ Failed to scrape group name from Facebook page")
             else:
-                logging.warning(f"❌ No driver provided for group name scraping")
+                log.warning("❌ No driver provided for group name scraping")
             
             # Fallback to URL-based name
             if not group_name:
-                logging.info(f"🔄 Using fallback group name for {group_url}")
+                log.info("🔄 Using fallback group name for %s", group_url)
                 group_name = f"Group from {group_url}"
         
-        logging.info(f"🔍 Attempting to create group: name='{group_name}', url='{group_url}', table='{table_suffix}'")
-        
-        cursor.execute(
-            "INSERT INTO Groups (group_name, group_url, table_name) VALUES (?, ?, ?)",
-            (group_name, group_url, table_suffix)
-        )
+        log.info("🔍 Attempting to create group: name='%s', url='%s', table='%s'", group_name, group_url, table_suffix)
         
-        group_id = cursor.lastrowid
-        logging.info(f"✅ Group created with ID: {group_id}")
+        if _HAS_RETURNING:
+            # A clash is ignored and returns no row, instead of raising from inside SQLite
+            cursor.execute(
+                "INSERT OR IGNORE INTO Groups (group_name, group_url, table_name) VALUES (?, ?, ?) RETURNING group_id",
+                (group_name, group_url, table_suffix)
+            )
+            inserted = cursor.fetchone()
+            if not inserted:
+                raise sqlite3.IntegrityError("group_url, group_name or table_name already exists in Groups")
+            group_id = inserted[0]
+        else:
+            cursor.execute(
+                "INSERT INTO Groups (group_name, group_url, table_name) VALUES (?, ?, ?)",
+                (group_name, group_url, table_suffix)
+            )
+            group_id = cursor.lastrowid
+        log.info("✅ Group created with ID: %s", group_id)
         
         # Create dedicated posts table for this group
         if create_group_posts_table(db_conn, table_suffix):
             db_conn.commit()
-            logging.info(f"🎯 Created new group {group_id} -> Posts_{table_suffix}")
-            return group_id, table_suffix
+            log.info("🎯 Created new group %s -> Posts_%s", group_id, table_suffix)
+            return _remember_group(group_url, group_id, table_suffix)
         else:
             raise Exception("Failed to create group posts table")
             
     except sqlite3.IntegrityError as e:
         # Handle unique constraint violations - group might already exist
-        logging.warning(f"⚠️ Integrity error (likely duplicate): {e}")
+        log.warning("⚠️ Integrity error (likely duplicate): %s", e)
         db_conn.rollback()
         
-        # Try to find the existing group again
-        cursor = db_conn.cursor()
-        cursor.execute("SELECT group_id, table_name FROM Groups WHERE group_url = ? OR table_name = ?", (group_url, table_suffix))
-        result = cursor.fetchone()
+        # A concurrent caller may already have cached it; otherwise find the existing group again
+        cached = _GROUP_CACHE.get(group_url)
+        if cached:
+            return cached
+        result = db_conn.execute(
+            "SELECT group_id, table_name FROM Groups WHERE group_url = ? OR table_name = ?", (group_url, table_suffix)
+        ).fetchone()
         if result:
             group_id, existing_table_suffix = result
-            logging.info(f"📋 Found existing group after integrity error: {group_id} -> {existing_table_suffix}")
-            return group_id, existing_table_suffix
+            log.info("📋 Found existing group after integrity error: %s -> %s", group_id, existing_table_suffix)
+            return _remember_group(group_url, group_id, existing_table_suffix)
         else:
-            logging.error(f"❌ Could not find group after integrity error: {e}")
+            log.error("❌ Could not find group after integrity error: %s", e)
             raise
     except sqlite3.Error as e:
-        logging.error(f"❌ Error in get_or_create_group: {e}")
+        log.error("❌ Error in get_or_create_group: %s", e)
         db_conn.rollback()
         raise
 
+def _utc_timestamp() -> str:
+    """Current UTC time in SQLite's CURRENT_TIMESTAMP format."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def _post_row(post_data: Dict, timestamp: str) -> tuple:
+    """Build the _sql_insert parameter tuple for one post (content_hash is at index 3)."""
+    ai_result = post_data.get('ai_result')
+    ai_relevant = None
+    if ai_result and isinstance(ai_result, dict):
+        ai_relevant = 1 if ai_result.get('relevant', False) else 0
+    return (
+        post_data.get('facebook_post_id'),
+        post_data.get('post_url'),
+        post_data.get('content_text'),
+        post_data.get('content_hash'),
+        ai_relevant,
+        timestamp if ai_result else None,
+        timestamp
+    )
+
+# Table suffixes whose Posts_* table is known to have a full unique index on content_hash
+_UNIQUE_HASH_TABLES: set = set()
+
+def _has_unique_hash_index(db_conn: sqlite3.Connection, table_suffix: str) -> bool:
+    """True if Posts_{suffix} enforces unique content_hash, which add_post_to_group's fast path relies on."""
+    if table_suffix in _UNIQUE_HASH_TABLES:
+        return True
+    try:
+        posts_table = _posts_table(table_suffix)
+        for index in db_conn.execute(f"PRAGMA index_list({posts_table})").fetchall():
+            # (seq, name, unique, origin, partial)
+            if not index[2] or index[4]:
+                continue
+            columns = [column[2] for column in db_conn.execute(f"PRAGMA index_info('{index[1]}')")]
+            if columns == ['content_hash']:
+                _UNIQUE_HASH_TABLES.add(table_suffix)
+                return True
+        return False
+    except sqlite3.Error as e:
+        log.debug("Could not inspect indexes of %s: %s", table_suffix, e)
+        return False
+
 def add_post_to_group(db_conn: sqlite3.Connection, table_suffix: str, post_data: Dict) -> Optional[Tuple[int, bool]]:
     """
     Add a post to the group-specific table.
@@ -371,90 +816,155 @@ def add_post_to_group(db_conn: sqlite3.Connection, table_suffix: str, post_data:
     Returns:
         Tuple of (internal_post_id, is_new) or None if failed
     """
+    if not _HAS_RETURNING or not _has_unique_hash_index(db_conn, table_suffix):
+        # The batch path checks for an existing hash before inserting, so it is safe without the index
+        results = add_posts_to_group(db_conn, table_suffix, [post_data])
+        return results[0] if results else None
+    
     try:
         cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        # Check if post already exists
-        post_url = post_data.get('post_url')
-        facebook_post_id = post_data.get('facebook_post_id')
+        posts_table = _posts_table(table_suffix)
         content_hash = post_data.get('content_hash')
         
-        # Check ONLY by content_hash - content is what matters, not URL or ID
-        cursor.execute(f"""
-            SELECT internal_post_id FROM {posts_table} 
-            WHERE content_hash = ?
-        """, (content_hash,))
-        
-        existing = cursor.fetchone()
-        if existing:
-            # Check if this is the same content (by hash) or updated content
-            cursor.execute(f"SELECT content_hash FROM {posts_table} WHERE internal_post_id = ?", (existing[0],))
-            existing_hash = cursor.fetchone()[0]
-            
-            if existing_hash == content_hash:
-                logging.info(f"📝 Post already exists with same content in {posts_table} with ID {existing[0]}")
-                return existing[0], False
-            else:
-                # Same post URL/ID but different content - update it
-                logging.info(f"🔄 Updating existing post {existing[0]} with new content (hash changed: {existing_hash[:12]}... → {content_hash[:12]}...)")
-                cursor.execute(f"""
-                    UPDATE {posts_table} 
-                    SET post_content_raw = ?, content_hash = ?, scraped_at = CURRENT_TIMESTAMP
-                    WHERE internal_post_id = ?
-                """, (post_data.get('content_text'), content_hash, existing[0]))
-                db_conn.commit()
-                return existing[0], True  # Return True to indicate it was updated (treat as new)
-        
-        # Extract AI result if provided
-        ai_result = post_data.get('ai_result')
-        ai_relevant = None
-        ai_processed_at = None
-        
-        if ai_result and isinstance(ai_result, dict):
-            ai_relevant = 1 if ai_result.get('relevant', False) else 0
-            ai_processed_at = 'CURRENT_TIMESTAMP'
-        
-        # Insert new post with AI results if available
-        if ai_result:
-            cursor.execute(f"""
-                INSERT OR IGNORE INTO {posts_table} (
-                    facebook_post_id, post_url, post_content_raw, content_hash, ai_relevant, ai_processed_at
-                ) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (
-                post_data.get('facebook_post_id'),
-                post_data.get('post_url'),
-                post_data.get('content_text'),
-                post_data.get('content_hash'),
-                ai_relevant
-            ))
-        else:
-            # Insert without AI results (will be processed later)
-            cursor.execute(f"""
-                INSERT OR IGNORE INTO {posts_table} (
-                    facebook_post_id, post_url, post_content_raw, content_hash
-                ) VALUES (?, ?, ?, ?)
-            """, (
-                post_data.get('facebook_post_id'),
-                post_data.get('post_url'),
-                post_data.get('content_text'),
-                post_data.get('content_hash')
-            ))
-        
-        if cursor.rowcount > 0:
-            post_id = cursor.lastrowid
-            db_conn.commit()
-            logging.info(f"✅ Added new post to {posts_table} with ID {post_id}")
-            return post_id, True
+        # Duplicates are detected ONLY by content_hash (unique index) - content is what matters, not URL or ID
+        cursor.execute(_sql_insert_returning(table_suffix), _post_row(post_data, _utc_timestamp()))
+        inserted = cursor.fetchone()
+        # Commit even for an ignored duplicate so the write lock taken by the INSERT is released
+        _commit(db_conn)
+        
+        if inserted:
+            _note_inserted(db_conn, table_suffix, (content_hash,))
+            log.info("✅ Added new post to %s with ID %s", posts_table, inserted[0])
+            return inserted[0], True
+        
+        existing_id = _fetch_ids_by_hash(cursor, posts_table, [content_hash]).get(content_hash)
+        log.info("📝 Post already exists with same content in %s with ID %s", posts_table, existing_id)
+        return existing_id, False
+        
+    except sqlite3.Error as e:
+        log.error("❌ Error adding post to %s: %s", table_suffix, e)
+        _rollback(db_conn)
+        return None
+
+def add_posts_to_group(db_conn: sqlite3.Connection, table_suffix: str, posts: List[Dict]) -> Optional[List[Tuple[int, bool]]]:
+    """
+    Add a batch of posts to the group-specific table in a single transaction.
+
+    Args:
+        db_conn: Database connection
+        table_suffix: Group table suffix (e.g., 'Group_501702489979518')
+        posts: List of post data dictionaries (same shape as add_post_to_group)
+
+    Returns:
+        List of (internal_post_id, is_new) tuples in the same order as posts, or None if failed
+    """
+    if not posts:
+        return []
+
+    try:
+        cursor = db_conn.cursor()
+        posts_table = _posts_table(table_suffix)
+        hashes = list(dict.fromkeys(post.get('content_hash') for post in posts))
+
+        if not db_conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        # One lookup for every hash already stored (chunked to stay under SQLite's variable limit)
+        existing_ids = _fetch_ids_by_hash(cursor, posts_table, hashes)
+
+        rows = []
+        queued = set(existing_ids)
+        timestamp = _utc_timestamp()
+        for post in posts:
+            content_hash = post.get('content_hash')
+            if content_hash in queued:
+                continue
+            queued.add(content_hash)
+            rows.append(_post_row(post, timestamp))
+
+        if rows:
+            cursor.executemany(_sql_insert(table_suffix), rows)
+            new_ids = _fetch_ids_by_hash(cursor, posts_table, [row[3] for row in rows])
         else:
-            logging.info(f"📝 Post already exists in {posts_table} (INSERT OR IGNORE)")
-            return None, False
-            
+            new_ids = {}
+
+        _commit(db_conn)
+        if new_ids:
+            _note_inserted(db_conn, table_suffix, new_ids.keys())
+        log.info("✅ Added %s new posts to %s (%s already stored)", len(new_ids), posts_table, len(posts) - len(new_ids))
+
+        results = []
+        reported = set()
+        for post in posts:
+            content_hash = post.get('content_hash')
+            if content_hash in new_ids and content_hash not in reported:
+                reported.add(content_hash)
+                results.append((new_ids[content_hash], True))
+            else:
+                results.append((existing_ids.get(content_hash, new_ids.get(content_hash)), False))
+        return results
+
     except sqlite3.Error as e:
-        logging.error(f"❌ Error adding post to {table_suffix}: {e}")
-        db_conn.rollback()
+        log.error("❌ Error adding posts to %s: %s", table_suffix, e)
+        _rollback(db_conn)
         return None
 
+def _fetch_ids_by_hash(cursor: sqlite3.Cursor, posts_table: str, hashes: List[str], chunk_size: int = 500) -> Dict[str, int]:
+    """Map content_hash -> internal_post_id for the given hashes using batched IN queries."""
+    ids = {}
+    for start in range(0, len(hashes), chunk_size):
+        chunk = hashes[start:start + chunk_size]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(
+            f"SELECT content_hash, internal_post_id FROM {posts_table} WHERE content_hash IN ({placeholders})",
+            chunk
+        )
+        ids.update(cursor.fetchall())
+    return ids
+
+# table_suffix -> (fetched_at, (facebook_post_id, content_hash, post_url)); cleared on insert
+_LATEST_CACHE: Dict[str, Tuple[float, Tuple[Optional[str], Optional[str], Optional[str]]]] = {}
+_LATEST_TTL_SECS = 2.0
+
+# table_suffix -> every content_hash stored in Posts_{suffix}; loaded once, then kept current on insert
+_HASH_SETS: Dict[str, set] = {}
+
+def _note_inserted(db_conn: sqlite3.Connection, table_suffix: str, content_hashes) -> None:
+    """Refresh in-process caches after new posts were written to Posts_{suffix}."""
+    touched = _ACTIVE_TXNS.get(id(db_conn))
+    if touched is not None:
+        # Not committed yet; group_write_txn drops this table's caches if it rolls back
+        touched.add(table_suffix)
+    _LATEST_CACHE.pop(table_suffix, None)
+    known = _HASH_SETS.get(table_suffix)
+    if known is not None:
+        known.update(content_hashes)
+
+def get_most_recent_post_markers(db_conn: sqlite3.Connection, table_suffix: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Get the most recent Facebook post ID, content hash and post URL in a single query.
+    Results are memoized for a couple of seconds and invalidated when posts are added.
+    
+    Args:
+        db_conn: Database connection
+        table_suffix: Group table suffix (e.g., 'Group_123456')
+        
+    Returns:
+        Tuple of (facebook_post_id, content_hash, post_url); entries are None when missing
+    """
+    cached = _LATEST_CACHE.get(table_suffix)
+    if cached and time.monotonic() - cached[0] < _LATEST_TTL_SECS:
+        return cached[1]
+    
+    try:
+        markers = tuple(db_conn.execute(_sql_latest_markers(table_suffix)).fetchone())
+        _LATEST_CACHE[table_suffix] = (time.monotonic(), markers)
+        return markers
+        
+    except sqlite3.Error as e:
+        log.error("❌ Error getting most recent post markers from %s: %s", table_suffix, e)
+        return None, None, None
+
 def get_most_recent_facebook_post_id(db_conn: sqlite3.Connection, table_suffix: str) -> str | None:
     """
     Get the most recent Facebook post ID from database for super simple duplicate checking.
@@ -467,22 +977,11 @@ def get_most_recent_facebook_post_id(db_conn: sqlite3.Connection, table_suffix:
         Most recent facebook_post_id or None if no posts exist
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT facebook_post_id FROM {posts_table} 
-            WHERE facebook_post_id IS NOT NULL AND facebook_post_id != ''
-            AND facebook_post_id NOT LIKE 'generated_%'
-            ORDER BY internal_post_id DESC
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
+        result = db_conn.execute(_sql_latest_facebook_post_id(table_suffix)).fetchone()
         return result[0] if result else None
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error getting most recent Facebook post ID from {table_suffix}: {e}")
+        log.error("❌ Error getting most recent Facebook post ID from %s: %s", table_suffix, e)
         return None
 
 def get_most_recent_post_content_hash(db_conn: sqlite3.Connection, table_suffix: str) -> str | None:
@@ -497,21 +996,11 @@ def get_most_recent_post_content_hash(db_conn: sqlite3.Connection, table_suffix:
         Most recent content_hash or None if no posts exist
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT content_hash FROM {posts_table} 
-            WHERE content_hash IS NOT NULL AND content_hash != ''
-            ORDER BY internal_post_id DESC
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
+        result = db_conn.execute(_sql_latest_hash(table_suffix)).fetchone()
         return result[0] if result else None
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error getting most recent content hash from {table_suffix}: {e}")
+        log.error("❌ Error getting most recent content hash from %s: %s", table_suffix, e)
         return None
 
 def get_most_recent_post_url(db_conn: sqlite3.Connection, table_suffix: str) -> str | None:
@@ -520,21 +1009,11 @@ def get_most_recent_post_url(db_conn: sqlite3.Connection, table_suffix: str) ->
     Use get_most_recent_post_content_hash() instead for better incremental scraping.
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT post_url FROM {posts_table} 
-            WHERE post_url IS NOT NULL AND post_url != ''
-            ORDER BY internal_post_id DESC
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
+        result = db_conn.execute(_sql_latest_url(table_suffix)).fetchone()
         return result[0] if result else None
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error getting most recent URL from {table_suffix}: {e}")
+        log.error("❌ Error getting most recent URL from %s: %s", table_suffix, e)
         return None
 
 def get_group_posts(db_conn: sqlite3.Connection, table_suffix: str, limit: int = 20) -> List[Dict]:
@@ -550,26 +1029,28 @@ def get_group_posts(db_conn: sqlite3.Connection, table_suffix: str, limit: int =
         List of post dictionaries
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT * FROM {posts_table} 
-            ORDER BY internal_post_id DESC 
-            LIMIT ?
-        """, (limit,))
-        
-        posts = []
-        for row in cursor.fetchall():
-            post_dict = dict(row)
-            posts.append(post_dict)
-        
-        return posts
+        return list(iter_group_posts(db_conn, table_suffix, limit))
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error getting posts from {table_suffix}: {e}")
+        log.error("❌ Error getting posts from %s: %s", table_suffix, e)
         return []
 
+def iter_group_posts(db_conn: sqlite3.Connection, table_suffix: str, limit: int = 20) -> Iterator[Dict]:
+    """
+    Stream posts from a specific group table, newest first, without building the whole list.
+    Unlike get_group_posts, database errors propagate to the caller while iterating.
+    
+    Args:
+        db_conn: Database connection
+        table_suffix: Group table suffix
+        limit: Maximum number of posts to yield
+        
+    Yields:
+        Post dictionaries
+    """
+    for row in db_conn.execute(_sql_group_posts(table_suffix), (limit,)):
+        yield dict(row)
+
 def list_all_groups(db_conn: sqlite3.Connection) -> List[Dict]:
     """
     List all groups with their post counts.
@@ -579,31 +1060,38 @@ def list_all_groups(db_conn: sqlite3.Connection) -> List[Dict]:
     """
     try:
         cursor = db_conn.cursor()
+        # post_count is maintained by triggers on each Posts_* table
         cursor.execute("SELECT * FROM Groups ORDER BY group_id")
         
-        groups = []
-        for row in cursor.fetchall():
-            group_dict = dict(row)
-            
-            # Get post count for this group
-            table_suffix = group_dict['table_name']
-            posts_table = f"Posts_{table_suffix}"
-            
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM {posts_table}")
-                post_count = cursor.fetchone()[0]
-                group_dict['post_count'] = post_count
-            except sqlite3.Error:
-                group_dict['post_count'] = 0
-            
-            groups.append(group_dict)
+        groups = [dict(row) for row in cursor.fetchall()]
+        
+        uncounted = [group for group in groups if group.get('post_count') is None]
+        if uncounted:
+            # Database predates post_count tracking - count every such table in one UNION ALL query
+            counts = _count_posts(cursor, [group['table_name'] for group in uncounted])
+            for group in uncounted:
+                group['post_count'] = counts.get(group['table_name'], 0)
         
         return groups
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error listing groups: {e}")
+        log.error("❌ Error listing groups: %s", e)
         return []
 
+def _count_posts(cursor: sqlite3.Cursor, table_suffixes: List[str]) -> Dict[str, int]:
+    """Map table_suffix -> row count for the existing Posts_{suffix} tables, in a single query."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'Posts_%'")
+    existing = {row[0] for row in cursor.fetchall()}
+    selects = [
+        f"SELECT '{table_suffix}', COUNT(*) FROM {_posts_table(table_suffix)}"
+        for table_suffix in table_suffixes
+        if _VALID_SUFFIX_RE.match(table_suffix) and f"Posts_{table_suffix}" in existing
+    ]
+    if not selects:
+        return {}
+    cursor.execute(" UNION ALL ".join(selects))
+    return dict(cursor.fetchall())
+
 def drop_group_table(db_conn: sqlite3.Connection, group_id: int) -> bool:
     """
     Drop posts table for a specific group and remove from Groups table.
@@ -623,30 +1111,44 @@ def drop_group_table(db_conn: sqlite3.Connection, group_id: int) -> bool:
         result = cursor.fetchone()
         
         if not result:
-            logging.warning(f"⚠️ Group {group_id} not found")
+            log.warning("⚠️ Group %s not found", group_id)
             return False
         
         table_suffix = result[0]
-        posts_table = f"Posts_{table_suffix}"
-        
-        # Drop posts table
-        cursor.execute(f"DROP TABLE IF EXISTS {posts_table}")
-        
-        # Remove from Groups table
-        cursor.execute("DELETE FROM Groups WHERE group_id = ?", (group_id,))
+        posts_table = _posts_table(table_suffix)
         
+        # Drop posts table with its hash index and count triggers, and remove from Groups table, atomically
         db_conn.commit()
-        logging.info(f"🗑️ Dropped {posts_table} and removed group {group_id}")
+        cursor.executescript(f"""
+            BEGIN;
+            DROP TRIGGER IF EXISTS trg_{table_suffix}_ins;
+            DROP TRIGGER IF EXISTS trg_{table_suffix}_del;
+            DROP INDEX IF EXISTS idx_{posts_table}_hash;
+            DROP INDEX IF EXISTS idx_{posts_table}_real_fbid;
+            DROP INDEX IF EXISTS idx_{posts_table}_real_url;
+            DROP INDEX IF EXISTS idx_{posts_table}_unprocessed;
+            DROP INDEX IF EXISTS idx_{posts_table}_scraped_at;
+            DROP TABLE IF EXISTS {posts_table};
+            DELETE FROM Groups WHERE group_id = {int(group_id)};
+            COMMIT;
+        """)
+        _LATEST_CACHE.pop(table_suffix, None)
+        _HASH_SETS.pop(table_suffix, None)
+        _MIGRATED.discard(table_suffix)
+        _UNIQUE_HASH_TABLES.discard(table_suffix)
+        clear_group_cache(group_id)
+        log.info("🗑️ Dropped %s and removed group %s", posts_table, group_id)
         return True
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error dropping group {group_id}: {e}")
+        log.error("❌ Error dropping group %s: %s", group_id, e)
         db_conn.rollback()
         return False
 
 def content_hash_exists(db_conn: sqlite3.Connection, table_suffix: str, content_hash: str) -> bool:
     """
     Check if a content hash already exists in the database.
+    The table's hashes are loaded into memory on first use, so later checks skip SQLite.
     
     Args:
         db_conn: Database connection
@@ -657,19 +1159,54 @@ def content_hash_exists(db_conn: sqlite3.Connection, table_suffix: str, content_
         True if hash exists, False otherwise
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
+        return content_hash in _load_hash_set(db_conn, table_suffix)
+    except sqlite3.Error:
+        return False
+
+def _load_hash_set(db_conn: sqlite3.Connection, table_suffix: str) -> set:
+    """Return the cached hash set for Posts_{suffix}, reading the column once on a cold cache."""
+    known = _HASH_SETS.get(table_suffix)
+    if known is None:
+        known = {row[0] for row in db_conn.execute(_sql_all_hashes(table_suffix))}
+        _HASH_SETS[table_suffix] = known
+    return known
+
+def filter_unseen_hashes(db_conn: sqlite3.Connection, table_suffix: str, hashes: List[str]) -> set:
+    """
+    Return the subset of hashes found in neither Posts_{suffix} nor Processed_{suffix}.
+    
+    Args:
+        db_conn: Database connection
+        table_suffix: Group table suffix
+        hashes: Content hashes of freshly scraped posts
         
-        cursor.execute(f"""
-            SELECT 1 FROM {posts_table} 
-            WHERE content_hash = ? 
-            LIMIT 1
-        """, (content_hash,))
+    Returns:
+        Set of hashes not seen before (all of them if the tables can't be read)
+    """
+    unseen = set(hashes)
+    if not unseen:
+        return unseen
+    
+    try:
+        # Posts_* lookups come from the in-process hash set
+        unseen -= _load_hash_set(db_conn, table_suffix)
         
-        return cursor.fetchone() is not None
+        processed_table = _processed_table(table_suffix)
+        cursor = db_conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (processed_table,))
+        if unseen and cursor.fetchone():
+            candidates = list(unseen)
+            for start in range(0, len(candidates), 500):
+                chunk = candidates[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT content_hash FROM {processed_table} WHERE content_hash IN ({placeholders})", chunk)
+                unseen.difference_update(row[0] for row in cursor.fetchall())
         
-    except sqlite3.Error:
-        return False
+        return unseen
+        
+    except sqlite3.Error as e:
+        log.error("❌ Error filtering seen hashes for %s: %s", table_suffix, e)
+        return set(hashes)
 
 def get_unprocessed_posts(db_conn: sqlite3.Connection, table_suffix: str, limit: int = 50) -> List[Dict]:
     """
@@ -684,18 +1221,7 @@ def get_unprocessed_posts(db_conn: sqlite3.Connection, table_suffix: str, limit:
         List of unprocessed posts
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT internal_post_id, facebook_post_id, post_url, post_content_raw, content_hash
-            FROM {posts_table}
-            WHERE ai_relevant IS NULL
-            ORDER BY internal_post_id ASC
-            LIMIT ?
-        """, (limit,))
-        
-        rows = cursor.fetchall()
+        rows = db_conn.execute(_sql_unprocessed_posts(table_suffix), (limit,)).fetchall()
         posts = []
         for row in rows:
             posts.append({
@@ -709,7 +1235,7 @@ def get_unprocessed_posts(db_conn: sqlite3.Connection, table_suffix: str, limit:
         return posts
         
     except Exception as e:
-        logging.error(f"❌ Error getting unprocessed posts from {table_suffix}: {e}")
+        log.error("❌ Error getting unprocessed posts from %s: %s", table_suffix, e)
         return []
 
 def update_ai_result(db_conn: sqlite3.Connection, table_suffix: str, internal_post_id: int, 
@@ -728,22 +1254,47 @@ def update_ai_result(db_conn: sqlite3.Connection, table_suffix: str, internal_po
         True if successful, False otherwise
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
+        cursor = db_conn.execute(_sql_update_ai_result(table_suffix), (1 if is_relevant else 0, internal_post_id))
         
-        cursor.execute(f"""
-            UPDATE {posts_table}
-            SET ai_relevant = ?, ai_processed_at = CURRENT_TIMESTAMP
-            WHERE internal_post_id = ?
-        """, (1 if is_relevant else 0, internal_post_id))
-        
-        db_conn.commit()
+        _commit(db_conn)
         return cursor.rowcount > 0
         
     except Exception as e:
-        logging.error(f"❌ Error updating AI result for post {internal_post_id}: {e}")
+        log.error("❌ Error updating AI result for post %s: %s", internal_post_id, e)
         return False
 
+def update_ai_results_bulk(db_conn: sqlite3.Connection, table_suffix: str, results: List[Tuple[int, bool]]) -> int:
+    """
+    Update AI processing results for many posts in a single transaction.
+    
+    Args:
+        db_conn: Database connection
+        table_suffix: Table suffix (e.g., 'Group_501702489979518')
+        results: (internal_post_id, is_relevant) tuples
+        
+    Returns:
+        Number of posts updated (0 if failed)
+    """
+    if not results:
+        return 0
+    
+    try:
+        cursor = db_conn.cursor()
+        if not db_conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        cursor.executemany(
+            _sql_update_ai_result(table_suffix),
+            ((1 if is_relevant else 0, internal_post_id) for internal_post_id, is_relevant in results)
+        )
+        
+        _commit(db_conn)
+        return cursor.rowcount
+        
+    except sqlite3.Error as e:
+        log.error("❌ Error updating AI results in %s: %s", table_suffix, e)
+        _rollback(db_conn)
+        return 0
+
 def get_newly_relevant_posts(db_conn: sqlite3.Connection, table_suffix: str, 
                            since_minutes: int = 5) -> List[Dict]:
     """
@@ -758,18 +1309,8 @@ def get_newly_relevant_posts(db_conn: sqlite3.Connection, table_suffix: str,
         List of newly relevant posts
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        cursor.execute(f"""
-            SELECT internal_post_id, facebook_post_id, post_url, post_content_raw
-            FROM {posts_table}
-            WHERE ai_relevant = 1 
-            AND scraped_at >= datetime('now', '-{since_minutes} minutes')
-            ORDER BY internal_post_id ASC
-        """)
-        
-        rows = cursor.fetchall()
+        # Bound modifier keeps the SQL text constant so the prepared statement is reused
+        rows = db_conn.execute(_sql_newly_relevant(table_suffix), (f"-{int(since_minutes)} minutes",)).fetchall()
         posts = []
         for row in rows:
             posts.append({
@@ -782,7 +1323,7 @@ def get_newly_relevant_posts(db_conn: sqlite3.Connection, table_suffix: str,
         return posts
         
     except Exception as e:
-        logging.error(f"❌ Error getting newly relevant posts from {table_suffix}: {e}")
+        log.error("❌ Error getting newly relevant posts from %s: %s", table_suffix, e)
         return []
 
 # Helper function for Telegram bot
@@ -798,22 +1339,9 @@ def get_latest_post_url(db_conn: sqlite3.Connection, table_suffix: str) -> Optio
         Most recent post URL or None
     """
     try:
-        cursor = db_conn.cursor()
-        posts_table = f"Posts_{table_suffix}"
-        
-        # Only use real Facebook post URLs for incremental scraping, not group URLs or generated ones
-        cursor.execute(f"""
-            SELECT post_url FROM {posts_table} 
-            WHERE post_url NOT LIKE '%no_url_generated_%'
-            AND post_url LIKE '%facebook.com%'
-            AND post_url LIKE '%/posts/%'
-            ORDER BY internal_post_id DESC 
-            LIMIT 1
-        """)
-        
-        result = cursor.fetchone()
+        result = db_conn.execute(_sql_latest_real_post_url(table_suffix)).fetchone()
         return result[0] if result else None
         
     except sqlite3.Error as e:
-        logging.error(f"❌ Error getting latest post from {table_suffix}: {e}")
+        log.error("❌ Error getting latest post from %s: %s", table_suffix, e)
         return None 
\ No newline at end of file
@@ -10,7 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database.crud import get_db_connection, botsettings_get
-from config import get_bot_runner_settings
+from config import configure_logging, get_bot_runner_settings
 from ai.openai_service import decide_and_summarize_for_post
 
 def debug_ai_processing():
@@ -86,4 +86,5 @@ def debug_ai_processing():
         conn.close()
 
 if __name__ == "__main__":
+    configure_logging()
     debug_ai_processing() 
\ No newline at end of file
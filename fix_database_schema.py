@@ -4,46 +4,38 @@ Database Schema Migration Script
 Adds missing ai_relevant and ai_processed_at columns to existing tables.
 """
 
+import re
 import sqlite3
 import logging
+from config import configure_logging
 from database.crud import get_db_connection
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Required columns: (name, token regex matched against the stored CREATE TABLE text, column definition)
+REQUIRED_COLUMNS = (
+    ('ai_relevant', re.compile(r'\bai_relevant\b'), 'INTEGER DEFAULT NULL'),
+    ('ai_processed_at', re.compile(r'\bai_processed_at\b'), 'TIMESTAMP DEFAULT NULL'),
+)
 
 def get_all_posts_tables(conn):
-    """Get all Posts_* table names from the database."""
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'Posts_%'")
-    return [row[0] for row in cursor.fetchall()]
+    """Get every Posts_* table with its stored DDL, from a single sqlite_master scan."""
+    return {name: sql or '' for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND name LIKE 'Posts_%'")}
+
+def missing_columns(ddl):
+    """Names and definitions of required columns absent from a table's DDL (ALTER TABLE keeps it current)."""
+    return [(column, column_ddl) for column, pattern, column_ddl in REQUIRED_COLUMNS if not pattern.search(ddl)]
 
-def add_missing_columns(conn, table_name):
+def add_missing_columns(conn, table_name, ddl):
     """Add missing columns to a specific table."""
     cursor = conn.cursor()
-    
-    # Check if ai_relevant column exists
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [row[1] for row in cursor.fetchall()]
-    
     changes_made = False
     
-    # Add ai_relevant column if missing
-    if 'ai_relevant' not in columns:
+    for column, column_ddl in missing_columns(ddl):
         try:
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN ai_relevant INTEGER DEFAULT NULL")
-            logging.info(f"✅ Added ai_relevant column to {table_name}")
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {column_ddl}")
+            logging.info(f"✅ Added {column} column to {table_name}")
             changes_made = True
         except sqlite3.OperationalError as e:
-            logging.error(f"❌ Failed to add ai_relevant to {table_name}: {e}")
-    
-    # Add ai_processed_at column if missing
-    if 'ai_processed_at' not in columns:
-        try:
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN ai_processed_at TIMESTAMP DEFAULT NULL")
-            logging.info(f"✅ Added ai_processed_at column to {table_name}")
-            changes_made = True
-        except sqlite3.OperationalError as e:
-            logging.error(f"❌ Failed to add ai_processed_at to {table_name}: {e}")
+            logging.error(f"❌ Failed to add {column} to {table_name}: {e}")
     
     if not changes_made:
         logging.info(f"📝 {table_name} already has all required columns")
@@ -66,31 +58,29 @@ def main():
             logging.warning("⚠️ No Posts tables found in database")
             return
         
-        # Process each table
+        # Process each table, all ALTERs in one transaction
+        conn.execute("BEGIN")
         total_changes = 0
-        for table in tables:
+        for table, ddl in tables.items():
             logging.info(f"🔍 Checking table: {table}")
-            if add_missing_columns(conn, table):
+            if add_missing_columns(conn, table, ddl):
                 total_changes += 1
         
         # Commit changes
+        conn.commit()
         if total_changes > 0:
-            conn.commit()
             logging.info(f"✅ Migration complete! Updated {total_changes} tables")
         else:
             logging.info("📝 No changes needed - all tables are up to date")
         
-        # Verify the changes
+        # Verify the changes with one more sqlite_master scan
         logging.info("🔍 Verifying migration...")
-        for table in tables:
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table})")
-            columns = [row[1] for row in cursor.fetchall()]
-            
-            has_ai_relevant = 'ai_relevant' in columns
-            has_ai_processed_at = 'ai_processed_at' in columns
+        for table, ddl in get_all_posts_tables(conn).items():
+            missing = {column for column, _ in missing_columns(ddl)}
+            has_ai_relevant = 'ai_relevant' not in missing
+            has_ai_processed_at = 'ai_processed_at' not in missing
             
-            status = "✅" if (has_ai_relevant and has_ai_processed_at) else "❌"
+            status = "✅" if not missing else "❌"
             logging.info(f"{status} {table}: ai_relevant={has_ai_relevant}, ai_processed_at={has_ai_processed_at}")
         
         conn.close()
@@ -101,4 +91,5 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    configure_logging()
+    main()
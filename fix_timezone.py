@@ -5,81 +5,51 @@ Fix Database Timezone from UTC to EEST (GMT+3)
 
 import sqlite3
 import logging
-from datetime import datetime, timedelta
+from config import configure_logging
 from database.crud import get_db_connection
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
 
 def get_all_posts_tables(conn):
     """Get all Posts_* table names."""
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'Posts_%'")
-    return [row[0] for row in cursor.fetchall()]
+    return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'Posts_%'")]
 
 def convert_table_timezone(conn, table_name):
     """Convert UTC timestamps to EEST in a table."""
-    cursor = conn.cursor()
+    # One UPDATE per table using SQLite's datetime(); values it can't parse are kept as they are,
+    # and rows with nothing to shift are not rewritten at all
+    cursor = conn.execute(f"""
+        UPDATE {table_name}
+        SET scraped_at = COALESCE(datetime(REPLACE(scraped_at, 'Z', ''), '+3 hours'), scraped_at),
+            ai_processed_at = COALESCE(datetime(REPLACE(ai_processed_at, 'Z', ''), '+3 hours'), ai_processed_at)
+        WHERE datetime(REPLACE(scraped_at, 'Z', '')) IS NOT NULL
+           OR datetime(REPLACE(ai_processed_at, 'Z', '')) IS NOT NULL
+    """)
+    converted = cursor.rowcount
     
-    # Get all records with timestamps
-    cursor.execute(f"SELECT internal_post_id, scraped_at, ai_processed_at FROM {table_name}")
-    rows = cursor.fetchall()
-    
-    if not rows:
-        logging.info(f"📝 {table_name}: No records to convert")
+    if not converted:
+        log.info("📝 %s: No records to convert", table_name)
         return 0
     
-    converted = 0
-    for row in rows:
-        post_id, scraped_at, ai_processed_at = row
-        
-        # Convert scraped_at from UTC to EEST
-        if scraped_at:
-            try:
-                dt_utc = datetime.fromisoformat(scraped_at.replace('Z', ''))
-                dt_eest = dt_utc + timedelta(hours=3)
-                new_scraped_at = dt_eest.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                new_scraped_at = scraped_at  # Keep original if conversion fails
-        else:
-            new_scraped_at = scraped_at
-        
-        # Convert ai_processed_at from UTC to EEST
-        if ai_processed_at:
-            try:
-                dt_utc = datetime.fromisoformat(ai_processed_at.replace('Z', ''))
-                dt_eest = dt_utc + timedelta(hours=3)
-                new_ai_processed_at = dt_eest.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                new_ai_processed_at = ai_processed_at  # Keep original if conversion fails
-        else:
-            new_ai_processed_at = ai_processed_at
-        
-        # Update the record
-        cursor.execute(f"""
-            UPDATE {table_name} 
-            SET scraped_at = ?, ai_processed_at = ?
-            WHERE internal_post_id = ?
-        """, (new_scraped_at, new_ai_processed_at, post_id))
-        
-        converted += 1
-    
-    logging.info(f"✅ {table_name}: Converted {converted} records from UTC to EEST")
+    log.info("✅ %s: Converted %s records from UTC to EEST", table_name, converted)
     return converted
 
 def main():
     """Convert all timestamps from UTC to EEST."""
-    logging.info("🕐 Starting timezone conversion: UTC → EEST (GMT+3)")
+    log.info("🕐 Starting timezone conversion: UTC → EEST (GMT+3)")
     
     try:
         conn = get_db_connection()
         tables = get_all_posts_tables(conn)
         
         if not tables:
-            logging.warning("⚠️ No Posts tables found")
+            log.warning("⚠️ No Posts tables found")
             return
         
-        logging.info(f"📋 Found {len(tables)} tables to convert")
+        log.info("📋 Found %s tables to convert", len(tables))
         
+        # All tables in one transaction, committed once below
+        conn.execute("BEGIN IMMEDIATE")
         total_converted = 0
         for table in tables:
             converted = convert_table_timezone(conn, table)
@@ -89,12 +59,13 @@ def main():
         conn.commit()
         conn.close()
         
-        logging.info(f"🎉 Timezone conversion complete! Converted {total_converted} records total")
-        logging.info("📝 All timestamps are now in EEST (GMT+3)")
+        log.info("🎉 Timezone conversion complete! Converted %s records total", total_converted)
+        log.info("📝 All timestamps are now in EEST (GMT+3)")
         
     except Exception as e:
-        logging.error(f"❌ Conversion failed: {e}")
+        log.error("❌ Conversion failed: %s", e)
         raise
 
 if __name__ == "__main__":
+    configure_logging()
     main() 
\ No newline at end of file
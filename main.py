@@ -15,19 +15,16 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from bot.telegram_bot import ScrapiusTelegramBot
+from config import configure_logging
 from database.db_setup import init_db
 
 
 def setup_logging():
     """Configure logging for the application."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('scrapius.log', encoding='utf-8')
-        ]
-    )
+    configure_logging(handlers=[
+        logging.StreamHandler(),
+        logging.FileHandler('scrapius.log', encoding='utf-8')
+    ])
 
 
 def check_environment():
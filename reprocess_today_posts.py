@@ -1,30 +1,51 @@
 #!/usr/bin/env python3
 """
 Smart reprocessing script for today's unprocessed posts.
-Processes from oldest to newest with proper delays.
+Processes from oldest to newest with bounded, rate-limited concurrency.
 """
 
 import sqlite3
 import asyncio
 import logging
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import sys
 import os
+from collections import defaultdict
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database.crud import get_db_connection, botsettings_get
-from config import get_bot_runner_settings
+from config import configure_logging, get_bot_runner_settings
 from ai.openai_service import decide_and_summarize_for_post
-from database.simple_per_group import update_ai_result
+from database.simple_per_group import update_ai_results_bulk
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+log = logging.getLogger(__name__)
+
+# AI calls in flight at once, and the overall request rate they share
+MAX_CONCURRENT_AI_CALLS = 8
+AI_REQUESTS_PER_MINUTE = 60
+# AI results written per executemany/transaction
+AI_RESULT_BATCH_SIZE = 50
+# Flattens line breaks/tabs in the one-line content preview
+_PREVIEW_TABLE = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' '})
+
+class _RateLimiter:
+    """Spaces request start times evenly so concurrent tasks stay under a per-minute budget."""
+
+    def __init__(self, per_minute: int):
+        self._interval = 60.0 / per_minute
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
 
 def get_all_posts_today() -> List[Dict]:
     """Get ALL posts from today, ordered by scraped_at (oldest first)."""
@@ -35,87 +56,134 @@ def get_all_posts_today() -> List[Dict]:
     try:
         cursor = conn.cursor()
         
-        # Get all table names for groups
-        cursor.execute("SELECT table_name FROM Groups ORDER BY group_id")
+        # Get all table names for groups that actually have a posts table
+        cursor.execute("""
+            SELECT g.table_name FROM Groups g
+            JOIN sqlite_master m ON m.type = 'table' AND m.name = 'Posts_' || g.table_name
+            ORDER BY g.group_id
+        """)
         table_names = [row[0] for row in cursor.fetchall()]
+        if not table_names:
+            log.info("📋 Found 0 posts from today (will reprocess all)")
+            return []
         
-        all_posts = []
-        
-        for table_name in table_names:
-            posts_table = f"Posts_{table_name}"
-            
-            # Get ALL posts from today for this group (regardless of AI status)
-            cursor.execute(f"""
+        # ALL posts from today across every group (regardless of AI status), in one query.
+        # A plain range on scraped_at can use its index; DATE(scraped_at) would not.
+        sql = " UNION ALL ".join(
+            f"""
                 SELECT 
                     internal_post_id,
                     post_content_raw,
                     post_url,
                     scraped_at,
                     '{table_name}' as table_suffix
-                FROM {posts_table}
-                WHERE DATE(scraped_at) = DATE('now')
-                ORDER BY scraped_at ASC
-            """)
-            
-            group_posts = cursor.fetchall()
-            for post in group_posts:
-                all_posts.append({
-                    'internal_post_id': post[0],
-                    'content_text': post[1],
-                    'post_url': post[2],
-                    'scraped_at': post[3],
-                    'table_suffix': post[4]
-                })
+                FROM Posts_{table_name}
+                WHERE scraped_at >= date('now') AND scraped_at < date('now', '+1 day')
+            """
+            for table_name in table_names
+        ) + " ORDER BY scraped_at ASC"
+        cursor.execute(sql)
         
-        # Sort all posts by scraped_at (oldest first)
-        all_posts.sort(key=lambda x: x['scraped_at'])
+        all_posts = [
+            {
+                'internal_post_id': post[0],
+                'content_text': post[1],
+                'post_url': post[2],
+                'scraped_at': post[3],
+                'table_suffix': post[4]
+            }
+            for post in cursor  # rows are converted as SQLite steps, no intermediate tuple list
+        ]
         
-        logging.info(f"📋 Found {len(all_posts)} posts from today (will reprocess all)")
+        log.info("📋 Found %s posts from today (will reprocess all)", len(all_posts))
         return all_posts
         
     except Exception as e:
-        logging.error(f"❌ Error getting unprocessed posts: {e}")
+        log.error("❌ Error getting unprocessed posts: %s", e)
         return []
     finally:
         conn.close()
 
+def load_prompts() -> Optional[Tuple[str, str]]:
+    """Read the bot's system/user prompts (same as the bot uses), closing the connection straight away."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        default_system, default_user, _, _ = get_bot_runner_settings()
+        return (
+            botsettings_get(conn, 'bot_system', default_system),
+            botsettings_get(conn, 'bot_user', default_user),
+        )
+    finally:
+        conn.close()
+
 async def reprocess_posts_smart():
     """Smart reprocessing with delays and progress tracking."""
     
     # Get all posts from today
     posts = get_all_posts_today()
     if not posts:
-        logging.info("✅ No posts found from today!")
+        log.info("✅ No posts found from today!")
         return
     
-    # Get AI prompts
-    conn = get_db_connection()
-    if not conn:
-        logging.error("❌ Cannot connect to database")
+    # Get AI prompts; the connection is closed again before any AI call
+    prompts = load_prompts()
+    if not prompts:
+        log.error("❌ Cannot connect to database")
         return
+    system_prompt, user_prompt = prompts
+    
+    tasks = []
+    pending = defaultdict(list)
+    processed_count = 0
+    relevant_count = 0
+    error_count = 0
+    
+    def flush(table_suffix: str) -> None:
+        """Write one group's buffered AI results in a single transaction on a short-lived connection."""
+        nonlocal processed_count, relevant_count, error_count
+        batch = pending.pop(table_suffix, None)
+        if not batch:
+            return
+        conn = get_db_connection()
+        if not conn:
+            error_count += len(batch)
+            log.error("   ❌ Cannot connect to database to save %s AI results for Posts_%s", len(batch), table_suffix)
+            return
+        try:
+            updated = update_ai_results_bulk(conn, table_suffix, batch)
+        finally:
+            conn.close()
+        processed_count += updated
+        if updated == len(batch):
+            relevant_count += sum(1 for _, is_relevant in batch if is_relevant)
+        else:
+            error_count += len(batch) - updated
+            log.error("   ❌ Only %s/%s AI results saved to Posts_%s", updated, len(batch), table_suffix)
     
     try:
-        # Get prompts
-        default_system, default_user, _, _ = get_bot_runner_settings()
-        system_prompt = botsettings_get(conn, 'bot_system', default_system)
-        user_prompt = botsettings_get(conn, 'bot_user', default_user)
-        
-        logging.info(f"🚀 Starting smart reprocessing of {len(posts)} posts...")
-        logging.info(f"⏱️ Estimated time: {len(posts) * 2} seconds (2s delay per post)")
+        log.info("🚀 Starting smart reprocessing of %s posts...", len(posts))
+        log.info("⏱️ Estimated time: %s seconds (%s concurrent AI calls, max %s/min)",
+                 len(posts) * 60 // AI_REQUESTS_PER_MINUTE, MAX_CONCURRENT_AI_CALLS, AI_REQUESTS_PER_MINUTE)
         
-        processed_count = 0
-        relevant_count = 0
-        error_count = 0
+        # Checked once: the per-post preview is only built when it will be logged
+        log_progress = log.isEnabledFor(logging.INFO)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_AI_CALLS)
+        limiter = _RateLimiter(AI_REQUESTS_PER_MINUTE)
         
-        for i, post in enumerate(posts, 1):
-            try:
-                # Show progress with content glimpse
-                content_preview = post['content_text'][:150].replace('\n', ' ').strip()
-                if len(post['content_text']) > 150:
-                    content_preview += "..."
+        async def classify(i: int, post: Dict):
+            async with semaphore:
+                await limiter.wait()
                 
-                logging.info(f"🔄 [{i}/{len(posts)}] Processing post ID {post['internal_post_id']} from {post['scraped_at']}")
-                logging.info(f"   📝 Content ({len(post['content_text'])} chars): \"{content_preview}\"")
+                # Show progress with content glimpse
+                if log_progress:
+                    content_preview = post['content_text'][:150].translate(_PREVIEW_TABLE).strip()
+                    if len(post['content_text']) > 150:
+                        content_preview += "..."
+                    
+                    log.info("🔄 [%s/%s] Processing post ID %s from %s", i, len(posts), post['internal_post_id'], post['scraped_at'])
+                    log.info("   📝 Content (%s chars): \"%s\"", len(post['content_text']), content_preview)
                 
                 # Create post dict for AI - USE FULL CONTENT!
                 post_dict = {
@@ -124,66 +192,64 @@ async def reprocess_posts_smart():
                     'url': post['post_url']
                 }
                 
-                # AI processing
-                is_relevant, summary = decide_and_summarize_for_post(
-                    post_dict, 
-                    system_prompt,
-                    user_prompt
-                )
-                
-                # Update database
-                success = update_ai_result(
-                    conn, 
-                    post['table_suffix'], 
-                    post['internal_post_id'], 
-                    is_relevant, 
-                    summary
-                )
-                
-                if success:
-                    processed_count += 1
-                    if is_relevant:
-                        relevant_count += 1
-                    
-                    status = "✅ RELEVANT" if is_relevant else "⚪ Not relevant"
-                    logging.info(f"   {status} - Updated database successfully")
-                else:
-                    error_count += 1
-                    logging.error(f"   ❌ Failed to update database")
-                
-                # Smart delay - 2 seconds between posts to avoid rate limits
-                if i < len(posts):  # Don't delay after the last post
-                    await asyncio.sleep(2.0)
-                
-            except Exception as e:
-                error_count += 1
-                logging.error(f"   ❌ Error processing post {post['internal_post_id']}: {e}")
-                # Continue with next post
-                await asyncio.sleep(1.0)  # Shorter delay on error
+                try:
+                    # The OpenAI client is synchronous; run it off the event loop so calls overlap
+                    result = await asyncio.to_thread(
+                        decide_and_summarize_for_post,
+                        post_dict, 
+                        system_prompt,
+                        user_prompt
+                    )
+                except Exception as e:
+                    return post, e
+                return post, result
         
-        # Final summary
-        logging.info("=" * 60)
-        logging.info("🎉 REPROCESSING COMPLETE!")
-        logging.info(f"📊 Processed: {processed_count}/{len(posts)}")
-        logging.info(f"✅ Relevant: {relevant_count}")
-        logging.info(f"⚪ Not relevant: {processed_count - relevant_count}")
-        logging.info(f"❌ Errors: {error_count}")
-        logging.info("=" * 60)
+        tasks = [asyncio.ensure_future(classify(i, post)) for i, post in enumerate(posts, 1)]
         
-        if relevant_count > 0:
-            logging.info(f"🎯 Found {relevant_count} relevant posts that should now trigger notifications!")
+        # Save results as they arrive, one transaction per AI_RESULT_BATCH_SIZE rows of a group,
+        # so an interrupted run keeps everything classified so far
+        for next_done in asyncio.as_completed(tasks):
+            post, result = await next_done
+            if isinstance(result, Exception):
+                error_count += 1
+                log.error("   ❌ Error processing post %s: %s", post['internal_post_id'], result)
+                continue
+            
+            is_relevant, _ = result
+            status = "✅ RELEVANT" if is_relevant else "⚪ Not relevant"
+            log.info("   %s - Post ID %s", status, post['internal_post_id'])
+            pending[post['table_suffix']].append((post['internal_post_id'], is_relevant))
+            if len(pending[post['table_suffix']]) >= AI_RESULT_BATCH_SIZE:
+                flush(post['table_suffix'])
         
     except Exception as e:
-        logging.error(f"❌ Fatal error during reprocessing: {e}")
+        log.error("❌ Fatal error during reprocessing: %s", e)
     finally:
-        conn.close()
+        for task in tasks:
+            task.cancel()
+        # Whatever is still buffered, including after an error or Ctrl+C
+        for table_suffix in list(pending):
+            flush(table_suffix)
+    
+    # Final summary
+    log.info("=" * 60)
+    log.info("🎉 REPROCESSING COMPLETE!")
+    log.info("📊 Processed: %s/%s", processed_count, len(posts))
+    log.info("✅ Relevant: %s", relevant_count)
+    log.info("⚪ Not relevant: %s", processed_count - relevant_count)
+    log.info("❌ Errors: %s", error_count)
+    log.info("=" * 60)
+    
+    if relevant_count > 0:
+        log.info("🎯 Found %s relevant posts that should now trigger notifications!", relevant_count)
 
 if __name__ == "__main__":
+    configure_logging()
     print("🤖 Smart Post Reprocessing Tool")
     print("=" * 50)
     print("This will reprocess ALL posts from today (including previously processed ones)")
     print("Processing order: Oldest to newest")
-    print("Delay: 2 seconds between posts")
+    print(f"Rate: up to {MAX_CONCURRENT_AI_CALLS} AI calls at once, max {AI_REQUESTS_PER_MINUTE} per minute")
     print("=" * 50)
     
     confirm = input("Continue? (y/N): ").strip().lower()
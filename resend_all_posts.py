@@ -4,156 +4,194 @@ Resend All Posts Script for Scrapius Bot
 Sends all posts from the database to Telegram, ordered from oldest to newest.
 """
 
+import argparse
 import sqlite3
 import logging
 import time
 import sys
-from typing import List, Dict
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
 
-from config import get_telegram_settings
+from config import configure_logging, get_telegram_settings
 from database.crud import get_db_connection
 from database.simple_per_group import list_all_groups
-from notifier.telegram_notifier import send_telegram_message, format_post_message
+from notifier.telegram_notifier import broadcast_message, clean_post_text, format_post_message
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+_TITLE = "📩 Resent Post"
+_PREVIEW_CHARS = 300
 
-def get_all_posts_from_all_groups(conn) -> List[Dict]:
+def _readable_groups(conn, groups: List[Dict]) -> Dict[int, Dict]:
+    """Map group_id -> group for the groups whose Posts_* table exists (missing ones are logged)."""
+    try:
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'Posts_%'")
+        existing_tables = {row[0] for row in cursor}
+    except sqlite3.Error as e:
+        logging.error("❌ Error listing posts tables: %s", e)
+        return {}
+    groups_by_id = {}
+    for group in groups:
+        posts_table = f"Posts_{group['table_name']}"
+        if posts_table not in existing_tables:
+            logging.error("❌ Error reading from %s: table does not exist", posts_table)
+            continue
+        groups_by_id[group['group_id']] = group
+    return groups_by_id
+
+def count_posts(conn, groups_by_id: Dict[int, Dict], since: Optional[str] = None) -> int:
     """
-    Get all posts from all group tables, ordered by scraped_at (oldest first).
+    Count the posts iter_all_posts() would yield.
     
+    Args:
+        conn: Database connection
+        groups_by_id: Readable groups by group_id, as returned by _readable_groups()
+        since: Only count posts scraped at or after this UTC timestamp
+        
     Returns:
-        List of post dictionaries with group information
+        Number of posts
+    """
+    if since is None:
+        # Groups.post_count is kept current by triggers, so no table scan is needed
+        return sum(group.get('post_count') or 0 for group in groups_by_id.values())
+    
+    if not groups_by_id:
+        return 0
+    counts = " UNION ALL ".join(
+        f"SELECT COUNT(*) AS n FROM Posts_{group['table_name']} WHERE scraped_at >= ?"
+        for group in groups_by_id.values()
+    )
+    return conn.execute(f"SELECT SUM(n) FROM ({counts})", [since] * len(groups_by_id)).fetchone()[0] or 0
+
+def iter_all_posts(conn, groups_by_id: Dict[int, Dict], since: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Yield all posts from all group tables, ordered by scraped_at (oldest first).
+    Rows are read from the cursor as they are consumed, so only the current post is held in memory.
+    
+    Args:
+        conn: Database connection
+        groups_by_id: Readable groups by group_id, as returned by _readable_groups()
+        since: Only yield posts scraped at or after this UTC timestamp
+        
+    Yields:
+        Post dictionaries with group information
     """
-    all_posts = []
+    if not groups_by_id:
+        return
     
     try:
-        # Get all groups
-        groups = list_all_groups(conn)
-        logging.info(f"📊 Found {len(groups)} groups to process")
+        # Only the integer group_id goes into the SQL text; names/URLs are joined back in below
+        where = "WHERE scraped_at >= ?" if since is not None else ""
+        selects = [
+            f"""
+                SELECT 
+                    internal_post_id,
+                    facebook_post_id,
+                    post_url,
+                    post_content_raw,
+                    scraped_at,
+                    content_hash,
+                    {int(group_id)} AS group_id
+                FROM Posts_{group['table_name']}
+                {where}
+            """
+            for group_id, group in groups_by_id.items()
+        ]
+        params = [since] * len(selects) if since is not None else []
         
-        for group in groups:
-            group_id = group['group_id']
-            group_name = group['group_name']
-            group_url = group['group_url']
-            table_name = group['table_name']
-            
-            logging.info(f"📋 Processing group: {group_name}")
-            
-            # Get all posts from this group's table
-            cursor = conn.cursor()
-            posts_table = f"Posts_{table_name}"
-            
-            try:
-                cursor.execute(f"""
-                    SELECT 
-                        internal_post_id,
-                        facebook_post_id,
-                        post_url,
-                        post_content_raw,
-                        scraped_at,
-                        content_hash
-                    FROM {posts_table} 
-                    ORDER BY internal_post_id ASC
-                """)
-                
-                posts = cursor.fetchall()
-                logging.info(f"  📝 Found {len(posts)} posts in {posts_table}")
-                
-                # Convert to dictionaries and add group info
-                for post in posts:
-                    post_dict = {
-                        'internal_post_id': post[0],
-                        'facebook_post_id': post[1],
-                        'post_url': post[2],
-                        'post_content_raw': post[3],
-                        'scraped_at': post[4],
-                        'content_hash': post[5],
-                        'group_id': group_id,
-                        'group_name': group_name,
-                        'group_url': group_url,
-                        'table_name': table_name
-                    }
-                    all_posts.append(post_dict)
-                    
-            except sqlite3.Error as e:
-                logging.error(f"❌ Error reading from {posts_table}: {e}")
-                continue
+        # One query over every group's table. This ORDER BY matches each table's scraped_at index
+        # (which ends in the rowid, and group_id is constant per table), so SQLite merges the index
+        # scans directly instead of sorting everything in a temp b-tree. This script only reads: a table
+        # the bot hasn't migrated yet (no scraped_at index) is still returned in order, via a sort.
+        cursor = conn.execute(" UNION ALL ".join(selects) + " ORDER BY scraped_at ASC, internal_post_id ASC, group_id ASC", params)
+        
+        for post in cursor:
+            group = groups_by_id[post[6]]
+            yield {
+                'internal_post_id': post[0],
+                'facebook_post_id': post[1],
+                'post_url': post[2],
+                'post_content_raw': post[3],
+                'scraped_at': post[4],
+                'content_hash': post[5],
+                'group_id': post[6],
+                'group_name': group['group_name'],
+                'group_url': group['group_url'],
+                'table_name': group['table_name']
+            }
                 
-    except Exception as e:
-        logging.error(f"❌ Error getting posts: {e}")
-        return []
-    
-    # Sort all posts by scraped_at (oldest first)
-    all_posts.sort(key=lambda x: x['scraped_at'] or '0')
-    
-    logging.info(f"📊 Total posts collected: {len(all_posts)}")
-    return all_posts
+    except sqlite3.Error as e:
+        logging.error("❌ Error getting posts: %s", e)
 
-def resend_post_to_telegram(post: Dict, bot_token: str, chat_ids: List[str], delay: float = 1.0) -> bool:
+def resend_post_to_telegram(post: Dict, bot_token: str, group_chats: List[str], delay: float = 1.0) -> bool:
     """
     Send a single post to Telegram.
     
     Args:
         post: Post dictionary
         bot_token: Telegram bot token
-        chat_ids: List of chat IDs to send to
-        delay: Delay between messages to avoid rate limiting
+        group_chats: Group chat IDs to send to (already filtered to negative IDs)
+        delay: Delay after each post to avoid per-chat rate limiting
         
     Returns:
         True if sent successfully, False otherwise
     """
     try:
-        # Format the message
-        title = "📩 Resent Post"
-        content = post.get('post_content_raw', '')
-        
         # Clean and truncate content
-        clean_content = content.replace('See more', '').replace('Show more', '').replace('… Žr. daugiau', '').replace('Žr. daugiau', '').strip()
-        short_text = clean_content[:300] + '...' if len(clean_content) > 300 else clean_content
+        clean_content = clean_post_text(post.get('post_content_raw', ''))
+        short_text = clean_content[:_PREVIEW_CHARS] + '...' if len(clean_content) > _PREVIEW_CHARS else clean_content
         
         # Use post URL or group URL as fallback
         post_url = post.get('post_url') or post.get('group_url', '#')
         group_name = post.get('group_name', 'Unknown Group')
         
-        message = format_post_message(title, short_text, post_url, None, group_name)
+        # Post body plus timestamp trailer, built in one step
+        scraped_at = post.get('scraped_at') or 'Unknown'
+        message = f"{format_post_message(_TITLE, short_text, post_url, None, group_name)}\n\n🕐 <i>Originally scraped: {scraped_at}</i>"
         
-        # Add timestamp info
-        scraped_at = post.get('scraped_at', 'Unknown')
-        message += f"\n\n🕐 <i>Originally scraped: {scraped_at}</i>"
+        # Same post to every group chat at once (the notifier caps the global and per-chat rates)
+        started = time.monotonic()
+        results = broadcast_message(bot_token, group_chats, message, parse_mode="HTML")
+        post_id = post['internal_post_id']
+        for chat_id, success in zip(group_chats, results):
+            if success:
+                logging.info("✅ Sent post %s to chat %s", post_id, chat_id)
+            else:
+                logging.warning("⚠️ Failed to send post %s to chat %s", post_id, chat_id)
         
-        # Send to group chats only (negative IDs)
-        group_chats = [chat_id for chat_id in chat_ids if chat_id.startswith('-')]
+        # Rate limiting delay, once per post: Telegram also limits messages per group per minute.
+        # Time already spent sending counts towards it; the notifier enforces the per-chat minimum.
+        remaining = delay - (time.monotonic() - started)
+        if remaining > 0:
+            time.sleep(remaining)
         
-        if not group_chats:
-            logging.warning("⚠️ No group chats configured for notifications")
-            return False
-        
-        success_count = 0
-        for chat_id in group_chats:
-            try:
-                success = send_telegram_message(bot_token, chat_id, message, parse_mode="HTML")
-                if success:
-                    success_count += 1
-                    logging.info(f"✅ Sent post {post['internal_post_id']} to chat {chat_id}")
-                else:
-                    logging.warning(f"⚠️ Failed to send post {post['internal_post_id']} to chat {chat_id}")
-                
-                # Rate limiting delay
-                time.sleep(delay)
-                
-            except Exception as e:
-                logging.error(f"❌ Error sending to chat {chat_id}: {e}")
-                continue
-        
-        return success_count > 0
+        return any(results)
         
     except Exception as e:
-        logging.error(f"❌ Error formatting/sending post {post.get('internal_post_id')}: {e}")
+        logging.error("❌ Error formatting/sending post %s: %s", post.get('internal_post_id'), e)
         return False
 
-def main():
+def _since_arg(value: str) -> str:
+    """argparse type for --since: any ISO date/datetime, normalized to the stored 'YYYY-MM-DD HH:MM:SS' form."""
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date/datetime: {value!r}")
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc)
+    return since.strftime('%Y-%m-%d %H:%M:%S')
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resend stored posts to the Telegram group chats, oldest first.")
+    parser.add_argument('--yes', action='store_true', help="don't ask for confirmation (for cron/systemd runs)")
+    parser.add_argument('--delay', type=float, help="seconds between posts (default: ask, or 2.0 with --yes)")
+    parser.add_argument('--since', type=_since_arg, help="only posts scraped at/after this UTC date or datetime")
+    parser.add_argument('--group-id', type=int, action='append', dest='group_ids',
+                        help="only this group (repeat for several)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
     """Main function to resend all posts."""
+    args = parse_args(argv)
+    
     print("🚀 Scrapius Post Resender")
     print("=" * 50)
     
@@ -169,46 +207,65 @@ def main():
         logging.error("❌ Telegram settings not configured")
         sys.exit(1)
     
-    logging.info(f"📱 Bot token configured, sending to {len(chat_ids)} chats")
+    # Send to group chats only (negative IDs); filtered once here rather than per post
+    group_chats = [chat_id for chat_id in chat_ids if chat_id.startswith('-')]
+    if not group_chats:
+        logging.error("❌ No group chats configured for notifications")
+        sys.exit(1)
+    
+    logging.info("📱 Bot token configured, sending to %s group chats", len(group_chats))
     
-    # Get all posts
-    logging.info("📊 Collecting all posts from database...")
-    all_posts = get_all_posts_from_all_groups(conn)
+    # Count posts up front (Groups.post_count is kept current by triggers); posts are read lazily while sending
+    logging.info("📊 Counting posts in database...")
+    groups = list_all_groups(conn)
+    if args.group_ids:
+        groups = [group for group in groups if group['group_id'] in args.group_ids]
+    logging.info("📊 Found %s groups to process", len(groups))
+    # Checked once; both the count and the resend query only touch tables that exist
+    groups_by_id = _readable_groups(conn, groups)
+    total_posts = count_posts(conn, groups_by_id, args.since)
     
-    if not all_posts:
+    if not total_posts:
         logging.info("📭 No posts found in database")
         conn.close()
         return
     
     # Confirm with user
-    print(f"\n📊 Found {len(all_posts)} posts to resend")
-    print("⚠️  This will send ALL posts from oldest to newest")
+    print(f"\n📊 Found {total_posts} posts to resend")
+    if args.since:
+        print(f"🕐 Only posts scraped since {args.since} UTC")
+    print("⚠️  This will send ALL of these posts from oldest to newest")
     print("⚠️  This may take a while and could trigger rate limits")
     
-    confirm = input("\n❓ Are you sure you want to continue? (yes/no): ").lower().strip()
-    if confirm not in ['yes', 'y']:
-        print("❌ Cancelled by user")
-        conn.close()
-        return
+    if not args.yes:
+        confirm = input("\n❓ Are you sure you want to continue? (yes/no): ").lower().strip()
+        if confirm not in ['yes', 'y']:
+            print("❌ Cancelled by user")
+            conn.close()
+            return
     
-    # Ask for delay between messages
-    try:
-        delay = float(input("⏱️  Delay between messages in seconds (default 2.0): ") or "2.0")
-    except ValueError:
+    # Delay between messages: from --delay, otherwise ask (unattended runs use the default)
+    delay = args.delay
+    if delay is None:
         delay = 2.0
+        if not args.yes:
+            try:
+                delay = float(input("⏱️  Delay between messages in seconds (default 2.0): ") or "2.0")
+            except ValueError:
+                delay = 2.0
     
-    print(f"\n🚀 Starting to resend {len(all_posts)} posts with {delay}s delay...")
+    print(f"\n🚀 Starting to resend {total_posts} posts with {delay}s delay...")
     print("=" * 50)
     
     # Send posts
     sent_count = 0
     failed_count = 0
     
-    for i, post in enumerate(all_posts, 1):
+    for i, post in enumerate(iter_all_posts(conn, groups_by_id, args.since), 1):
         try:
-            print(f"📤 [{i}/{len(all_posts)}] Sending post from {post['group_name'][:30]}...")
+            print(f"📤 [{i}/{total_posts}] Sending post from {post['group_name'][:30]}...")
             
-            success = resend_post_to_telegram(post, bot_token, chat_ids, delay)
+            success = resend_post_to_telegram(post, bot_token, group_chats, delay)
             
             if success:
                 sent_count += 1
@@ -219,7 +276,7 @@ def main():
             print(f"\n⏹️  Interrupted by user after {sent_count} posts")
             break
         except Exception as e:
-            logging.error(f"❌ Unexpected error processing post {i}: {e}")
+            logging.error("❌ Unexpected error processing post %s: %s", i, e)
             failed_count += 1
             continue
     
@@ -236,4 +293,5 @@ def main():
     logging.info("🏁 Resend operation completed")
 
 if __name__ == "__main__":
+    configure_logging()
     main() 
\ No newline at end of file
@@ -6,81 +6,52 @@ Revert Database Timezone from EEST back to UTC
 
 import sqlite3
 import logging
-from datetime import datetime, timedelta
+from config import configure_logging
 from database.crud import get_db_connection
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
 
 def get_all_posts_tables(conn):
     """Get all Posts_* table names."""
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'Posts_%'")
-    return [row[0] for row in cursor.fetchall()]
+    return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'Posts_%'")]
 
 def revert_table_timezone(conn, table_name):
     """Convert EEST timestamps back to UTC."""
-    cursor = conn.cursor()
+    # One UPDATE per table using SQLite's datetime(); values it can't parse are kept as they are,
+    # and rows with nothing to shift are not rewritten at all
+    cursor = conn.execute(f"""
+        UPDATE {table_name}
+        SET scraped_at = COALESCE(datetime(REPLACE(scraped_at, 'Z', ''), '-3 hours'), scraped_at),
+            ai_processed_at = COALESCE(datetime(REPLACE(ai_processed_at, 'Z', ''), '-3 hours'), ai_processed_at)
+        WHERE datetime(REPLACE(scraped_at, 'Z', '')) IS NOT NULL
+           OR datetime(REPLACE(ai_processed_at, 'Z', '')) IS NOT NULL
+    """)
+    reverted = cursor.rowcount
     
-    # Get all records with timestamps
-    cursor.execute(f"SELECT internal_post_id, scraped_at, ai_processed_at FROM {table_name}")
-    rows = cursor.fetchall()
-    
-    if not rows:
-        logging.info(f"📝 {table_name}: No records to revert")
+    if not reverted:
+        log.info("📝 %s: No records to revert", table_name)
         return 0
     
-    reverted = 0
-    for row in rows:
-        post_id, scraped_at, ai_processed_at = row
-        
-        # Convert scraped_at from EEST back to UTC
-        if scraped_at:
-            try:
-                dt_eest = datetime.fromisoformat(scraped_at.replace('Z', ''))
-                dt_utc = dt_eest - timedelta(hours=3)  # Subtract 3 hours
-                new_scraped_at = dt_utc.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                new_scraped_at = scraped_at  # Keep original if conversion fails
-        else:
-            new_scraped_at = scraped_at
-        
-        # Convert ai_processed_at from EEST back to UTC
-        if ai_processed_at:
-            try:
-                dt_eest = datetime.fromisoformat(ai_processed_at.replace('Z', ''))
-                dt_utc = dt_eest - timedelta(hours=3)  # Subtract 3 hours
-                new_ai_processed_at = dt_utc.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                new_ai_processed_at = ai_processed_at  # Keep original if conversion fails
-        else:
-            new_ai_processed_at = ai_processed_at
-        
-        # Update the record
-        cursor.execute(f"""
-            UPDATE {table_name} 
-            SET scraped_at = ?, ai_processed_at = ?
-            WHERE internal_post_id = ?
-        """, (new_scraped_at, new_ai_processed_at, post_id))
-        
-        reverted += 1
-    
-    logging.info(f"✅ {table_name}: Reverted {reverted} records from EEST to UTC")
+    log.info("✅ %s: Reverted %s records from EEST to UTC", table_name, reverted)
     return reverted
 
 def main():
     """Revert all timestamps from EEST back to UTC."""
-    logging.info("🔄 Reverting timezone conversion: EEST → UTC (fixing double conversion)")
+    log.info("🔄 Reverting timezone conversion: EEST → UTC (fixing double conversion)")
     
+    conn = None
     try:
         conn = get_db_connection()
         tables = get_all_posts_tables(conn)
         
         if not tables:
-            logging.warning("⚠️ No Posts tables found")
+            log.warning("⚠️ No Posts tables found")
             return
         
-        logging.info(f"📋 Found {len(tables)} tables to revert")
+        log.info("📋 Found %s tables to revert", len(tables))
         
+        # All tables in one transaction, committed once below: one journal sync instead of one per table
+        conn.execute("BEGIN IMMEDIATE")
         total_reverted = 0
         for table in tables:
             reverted = revert_table_timezone(conn, table)
@@ -88,14 +59,20 @@ def main():
         
         # Commit all changes
         conn.commit()
-        conn.close()
         
-        logging.info(f"🎉 Timezone reversion complete! Reverted {total_reverted} records total")
-        logging.info("📝 All timestamps are now back to UTC (display will convert to EEST)")
+        log.info("🎉 Timezone reversion complete! Reverted %s records total", total_reverted)
+        log.info("📝 All timestamps are now back to UTC (display will convert to EEST)")
         
     except Exception as e:
-        logging.error(f"❌ Reversion failed: {e}")
+        log.error("❌ Reversion failed: %s", e)
+        # Leave every table as it was rather than half-reverted
+        if conn and conn.in_transaction:
+            conn.rollback()
         raise
+    finally:
+        if conn:
+            conn.close()
 
 if __name__ == "__main__":
+    configure_logging()
     main() 
\ No newline at end of file
@@ -14,7 +14,6 @@ import re
 import json
 from urllib.parse import urlparse, parse_qs
 import concurrent.futures
-import dateparser
 # Timestamp parsing abandoned - timestamps set to None
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from selenium.webdriver.common.action_chains import ActionChains
@@ -25,9 +24,6 @@ import os
 import subprocess
 import threading
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logging.getLogger().setLevel(logging.INFO)
-
 # Global variable to track virtual display process
 _xvfb_process = None
 
@@ -138,6 +134,21 @@ COMMENT_TIMESTAMP_LINK_BS = "a[aria-label*='Comment permalink']"
 POST_TIMESTAMP_ABBR_BS = 'abbr[title]'
 POST_TIMESTAMP_LINK_TEXT_BS = 'a[href*="/posts/"] span[data-lexical-text="true"]'
 
+# Compiled once at import instead of going through re's pattern cache on every post
+_RE_POST_ID_SLUG = re.compile(r'^[a-zA-Z0-9._-]+$')
+_RE_LONG_ID = re.compile(r'/(\d{10,})/?')
+_RE_BG_IMG = re.compile(r'background-image:\s*url\("?([^")]*)"?\)')
+# Cheap "does this look like a Facebook timestamp" probe (English and Lithuanian UI), used
+# instead of a full dateparser.parse() whose result was thrown away anyway
+_FB_DATE_HINT = re.compile(
+    r'\b(?:\d{1,2}:\d{2}|(?:yesterday|today|just now|vakar|šiandien|ką tik)\b'
+    r'|\d+\s*(?:[hmdwy]|hrs?|hours?|mins?|minutes?|days?|weeks?|months?|years?)\b'
+    r'|\d+\s*(?:val|min|d|sav|mėn|m)\.'
+    r'|(?:January|February|March|April|May|June|July|August|September|October|November|December'
+    r'|sausio|vasario|kovo|balandžio|gegužės|birželio|liepos|rugpjūčio|rugsėjo|spalio|lapkričio|gruodžio)\b)',
+    re.IGNORECASE
+)
+
 
 # PRODUCTION RELIABILITY: Enhanced retry decorator for all critical functions
 def production_retry(max_attempts=5):
@@ -440,7 +451,7 @@ def _get_post_identifiers_from_element(driver: WebDriver, post_element: Any, gro
                         if 'posts' in path_parts:
                             try:
                                 id_candidate = path_parts[path_parts.index('posts') + 1]
-                                if id_candidate.isdigit() or re.match(r'^[a-zA-Z0-9._-]+$', id_candidate):
+                                if id_candidate.isdigit() or _RE_POST_ID_SLUG.match(id_candidate):
                                     post_id = id_candidate
                             except IndexError:
                                 pass
@@ -453,7 +464,7 @@ def _get_post_identifiers_from_element(driver: WebDriver, post_element: Any, gro
                                     break
                     
                     if not post_id:
-                        id_match = re.search(r'/(\d{10,})/?', parsed_url.path)
+                        id_match = _RE_LONG_ID.search(parsed_url.path)
                         if id_match:
                             post_id = id_match.group(1)
         
@@ -511,7 +522,7 @@ def _extract_data_from_post_html(
     Selectively scrapes fields based on fields_to_scrape.
     This function is executed by worker threads and does not use Selenium WebDriver.
     """
-    soup = BeautifulSoup(post_html_content, 'html.parser')
+    soup = BeautifulSoup(post_html_content, 'lxml')
     post_data = {
         "facebook_post_id": post_id_from_main,
         "post_url": post_url_from_main or group_url_context,  # Fallback to group URL if no specific post URL
@@ -587,7 +598,7 @@ def _extract_data_from_post_html(
                     post_data["post_image_url"] = img_el['src']
                 elif img_el.name == 'div' and img_el.has_attr('style'):
                     style_attr = img_el['style']
-                    match = re.search(r'background-image:\s*url\("?([^")]*)"?\)', style_attr)
+                    match = _RE_BG_IMG.search(style_attr)
                     if match:
                         post_data["post_image_url"] = match.group(1)
         except Exception as e:
@@ -612,7 +623,7 @@ def _extract_data_from_post_html(
                 for link in potential_time_links:
                     link_title = link.get('title')
                     if link_title and len(link_title) > 5:
-                        if dateparser.parse(link_title, settings={'STRICT_PARSING': False}):
+                        if _FB_DATE_HINT.search(link_title):
                             raw_timestamp = link_title
                             logging.debug(f"BS: Timestamp from potential link title: {raw_timestamp} for post {post_id_from_main}")
                             break
@@ -621,7 +632,7 @@ def _extract_data_from_post_html(
 
                     link_aria_label = link.get('aria-label')
                     if link_aria_label and len(link_aria_label) > 5:
-                         if dateparser.parse(link_aria_label, settings={'STRICT_PARSING': False}):
+                         if _FB_DATE_HINT.search(link_aria_label):
                             raw_timestamp = link_aria_label
                             logging.debug(f"BS: Timestamp from potential link aria-label: {raw_timestamp} for post {post_id_from_main}")
                             break
@@ -630,7 +641,7 @@ def _extract_data_from_post_html(
 
                     link_text = link.get_text(strip=True)
                     if link_text and len(link_text) > 2 and len(link_text) < 30 and not (link_text.lower() == post_data.get("post_author_name","").lower() or "comment" in link_text.lower()):
-                        if dateparser.parse(link_text, settings={'STRICT_PARSING': False}):
+                        if _FB_DATE_HINT.search(link_text):
                             raw_timestamp = link_text
                             logging.debug(f"BS: Timestamp from potential link text: {raw_timestamp} for post {post_id_from_main}")
                             break
@@ -15,14 +15,8 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database.crud import get_db_connection
-from notifier.telegram_notifier import send_telegram_message
-from config import get_telegram_settings
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from notifier.telegram_notifier import send_telegram_message, clean_post_text, escape_html
+from config import configure_logging, get_telegram_settings
 
 def get_relevant_posts_today() -> List[Dict]:
     """Get only RELEVANT posts from today (ai_relevant = 1)."""
@@ -33,44 +27,48 @@ def get_relevant_posts_today() -> List[Dict]:
     try:
         cursor = conn.cursor()
         
-        # Get all table names for groups
-        cursor.execute("SELECT table_name, group_url FROM Groups ORDER BY group_id")
-        groups = cursor.fetchall()
+        # Get all table names for groups that have a posts table
+        cursor.execute("""
+            SELECT g.group_id, g.table_name, g.group_url FROM Groups g
+            JOIN sqlite_master m ON m.type = 'table' AND m.name = 'Posts_' || g.table_name
+            ORDER BY g.group_id
+        """)
+        groups = {group_id: (table_name, group_url) for group_id, table_name, group_url in cursor.fetchall()}
         
         relevant_posts = []
+        if not groups:
+            logging.info("📋 Found 0 RELEVANT posts from today")
+            return relevant_posts
         
-        for table_name, group_url in groups:
-            posts_table = f"Posts_{table_name}"
-            
-            # Get ONLY relevant posts from today
-            cursor.execute(f"""
+        # ONLY relevant posts from today across every group in one query, oldest first (merged from each table's scraped_at index).
+        # Only the integer group_id goes into the SQL text; table suffix and URL are looked up below.
+        cursor.execute(" UNION ALL ".join(
+            f"""
                 SELECT 
                     internal_post_id,
                     post_content_raw,
                     post_url,
                     scraped_at,
-                    '{table_name}' as table_suffix,
-                    '{group_url}' as group_url
-                FROM {posts_table}
-                WHERE DATE(scraped_at) = DATE('now')
+                    {int(group_id)} AS group_id
+                FROM Posts_{table_name}
+                WHERE scraped_at >= date('now') AND scraped_at < date('now', '+1 day')
                 AND ai_relevant = 1
-                ORDER BY scraped_at ASC
-            """)
-            
-            group_posts = cursor.fetchall()
-            for post in group_posts:
-                relevant_posts.append({
-                    'internal_post_id': post[0],
-                    'content_text': post[1],
-                    'post_url': post[2],
-                    'scraped_at': post[3],
-                    'table_suffix': post[4],
-                    'group_url': post[5],
-                    'group_name': post[5].split('/')[-1]  # Extract group name from URL
-                })
+            """
+            for group_id, (table_name, _) in groups.items()
+        ) + " ORDER BY scraped_at ASC, internal_post_id ASC, group_id ASC")
         
-        # Sort all posts by scraped_at (oldest first)
-        relevant_posts.sort(key=lambda x: x['scraped_at'])
+        # Iterate the cursor so rows are converted as SQLite steps, without an intermediate list
+        for post in cursor:
+            table_name, group_url = groups[post[4]]
+            relevant_posts.append({
+                'internal_post_id': post[0],
+                'content_text': post[1],
+                'post_url': post[2],
+                'scraped_at': post[3],
+                'table_suffix': table_name,
+                'group_url': group_url,
+                'group_name': group_url.split('/')[-1]  # Extract group name from URL
+            })
         
         logging.info(f"📋 Found {len(relevant_posts)} RELEVANT posts from today")
         return relevant_posts
@@ -112,13 +110,10 @@ async def send_relevant_posts():
         try:
             # Clean content
             content = post['content_text']
-            clean_content = content.replace('See more', '').replace('Show more', '').replace('… Žr. daugiau', '').replace('Žr. daugiau', '').strip()
+            clean_content = clean_post_text(content)
             
             # Escape HTML characters that might break Telegram parsing
-            clean_content_for_telegram = (clean_content
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('&', '&amp;'))
+            clean_content_for_telegram = escape_html(clean_content)
             
             # Show post preview
             print(f"\n📋 POST {i}/{len(posts)} - ID: {post['internal_post_id']}")
@@ -153,10 +148,10 @@ async def send_relevant_posts():
                 continue
             
             # Format message for Telegram
-            message = f"🔥 <b>Relevant Post from {post['group_name']}</b>\n\n"
+            message = f"🔥 <b>Relevant Post from {escape_html(post['group_name'])}</b>\n\n"
             message += f"{clean_content_for_telegram}\n\n"
             if post['post_url']:
-                message += f"🔗 <a href=\"{post['post_url']}\">View Post</a>\n"
+                message += f"🔗 <a href=\"{escape_html(post['post_url'])}\">View Post</a>\n"
             message += f"📅 {post['scraped_at']}"
             
             # Send to all chat IDs
@@ -193,6 +188,7 @@ async def send_relevant_posts():
     print("=" * 60)
 
 if __name__ == "__main__":
+    configure_logging()
     print("🎯 Send Today's Relevant Posts")
     print("=" * 50)
     print("This will send ONLY today's AI-relevant posts to Telegram")
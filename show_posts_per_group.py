@@ -4,6 +4,7 @@ Show Posts Per Group Statistics
 """
 
 import sqlite3
+from config import configure_logging
 from database.crud import get_db_connection
 from database.simple_per_group import list_all_groups
 
@@ -23,6 +24,7 @@ def show_posts_per_group():
         print("=" * 60)
         
         total_posts = 0
+        cursor = conn.cursor()  # one cursor reused for every group's queries
         
         for group in groups:
             group_id = group['group_id']
@@ -31,16 +33,13 @@ def show_posts_per_group():
             posts_table = f"Posts_{table_suffix}"
             
             # Get post count (already included in the group dict)
-            cursor = conn.cursor()
             post_count = group.get('post_count', 0)
             
             # Get AI processed count (if column exists)
             try:
-                cursor.execute(f"SELECT COUNT(*) FROM {posts_table} WHERE ai_relevant IS NOT NULL")
-                ai_processed = cursor.fetchone()[0]
-                
-                cursor.execute(f"SELECT COUNT(*) FROM {posts_table} WHERE ai_relevant = 1")
-                ai_relevant = cursor.fetchone()[0]
+                # Both counts from a single scan: COUNT(col) skips NULLs, SUM of the comparison counts 1s
+                cursor.execute(f"SELECT COUNT(ai_relevant), COALESCE(SUM(ai_relevant = 1), 0) FROM {posts_table}")
+                ai_processed, ai_relevant = cursor.fetchone()
                 
                 ai_info = f" | AI: {ai_processed} processed, {ai_relevant} relevant"
             except:
@@ -48,17 +47,20 @@ def show_posts_per_group():
             
             # Get latest post date (convert UTC to EEST)
             try:
-                cursor.execute(f"SELECT MAX(scraped_at) FROM {posts_table}")
-                latest_utc = cursor.fetchone()[0]
-                if latest_utc:
-                    from datetime import datetime, timedelta
-                    # Convert UTC to EEST (GMT+3)
-                    latest_dt = datetime.fromisoformat(latest_utc.replace('Z', ''))
-                    latest_eest = latest_dt + timedelta(hours=3)
-                    latest_info = f" | Latest: {latest_eest.strftime('%Y-%m-%d %H:%M:%S')} EEST"
-                else:
+                # Convert UTC to EEST (GMT+3) in SQL; datetime() yields NULL for values it can't parse
+                # instead of raising. The subquery keeps MAX() answered from the scraped_at index.
+                cursor.execute(f"""
+                    SELECT latest, datetime(REPLACE(latest, 'Z', ''), '+3 hours')
+                    FROM (SELECT MAX(scraped_at) AS latest FROM {posts_table})
+                """)
+                latest_utc, latest_eest = cursor.fetchone()
+                if not latest_utc:
                     latest_info = " | Latest: None"
-            except:
+                elif latest_eest:
+                    latest_info = f" | Latest: {latest_eest} EEST"
+                else:
+                    latest_info = ""
+            except sqlite3.Error:
                 latest_info = ""
             
             # Extract group name from URL
@@ -80,4 +82,5 @@ def show_posts_per_group():
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
+    configure_logging()
     show_posts_per_group() 
\ No newline at end of file
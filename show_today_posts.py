@@ -10,6 +10,7 @@ import os
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from config import configure_logging
 from database.crud import get_db_connection
 
 def show_all_posts_today():
@@ -22,35 +23,42 @@ def show_all_posts_today():
     try:
         cursor = conn.cursor()
         
-        # Get all groups with their URLs for reference
-        cursor.execute("SELECT group_id, group_url, table_name FROM Groups ORDER BY group_id")
+        # Get all groups (that have a posts table) with their URLs for reference
+        cursor.execute("""
+            SELECT g.group_id, g.group_url, g.table_name FROM Groups g
+            JOIN sqlite_master m ON m.type = 'table' AND m.name = 'Posts_' || g.table_name
+            ORDER BY g.group_id
+        """)
         groups = cursor.fetchall()
+        group_urls = {group_id: group_url for group_id, group_url, _ in groups}
         
         all_posts = []
         
         print("🔍 Collecting posts from all groups...")
         
-        for group_id, group_url, table_name in groups:
-            posts_table = f"Posts_{table_name}"
-            
-            # Get all posts from today for this group
-            cursor.execute(f"""
+        if groups:
+            # All posts from today across every group in one query, oldest first (merged from each table's scraped_at index)
+            cursor.execute(" UNION ALL ".join(
+                f"""
                 SELECT 
                     internal_post_id,
                     post_content_raw,
                     post_url,
                     scraped_at,
                     ai_relevant,
-                    ai_processed_at
-                FROM {posts_table}
-                WHERE DATE(scraped_at) = DATE('now')
-                ORDER BY scraped_at ASC
-            """)
+                    ai_processed_at,
+                    {int(group_id)} AS group_id
+                FROM Posts_{table_name}
+                WHERE scraped_at >= date('now') AND scraped_at < date('now', '+1 day')
+                """
+                for group_id, _, table_name in groups
+            ) + " ORDER BY scraped_at ASC, internal_post_id ASC, group_id ASC")
             
-            group_posts = cursor.fetchall()
-            for post in group_posts:
+            # Iterate the cursor so rows are converted as SQLite steps, without an intermediate list
+            for post in cursor:
+                group_url = group_urls[post[6]]
                 all_posts.append({
-                    'group_id': group_id,
+                    'group_id': post[6],
                     'group_url': group_url,
                     'group_name': group_url.split('/')[-1],  # Extract group name from URL
                     'internal_post_id': post[0],
@@ -61,9 +69,6 @@ def show_all_posts_today():
                     'ai_processed_at': post[5]
                 })
         
-        # Sort all posts by scraped_at (oldest first)
-        all_posts.sort(key=lambda x: x['scraped_at'])
-        
         print(f"\n📊 Found {len(all_posts)} posts from today")
         print("=" * 80)
         
@@ -120,6 +125,7 @@ def show_all_posts_today():
         conn.close()
 
 if __name__ == "__main__":
+    configure_logging()
     print("📋 Today's Posts Viewer")
     print("=" * 50)
     print("This will show ALL posts from today with full content")